@@ -0,0 +1,290 @@
+"""Кэш в файле SQLite, общий для всех процессов на сервере.
+
+LocMemCache у каждого процесса свой: сдвиг поколения ленты в одном
+процессе не виден другим, а каждый новый процесс начинает с холодного
+кэша. Этот бэкенд хранит записи в одном файле (LOCATION) и подходит
+для нескольких WSGI-процессов одной машины без отдельного сервера:
+
+    CACHES = {
+        "default": {
+            "BACKEND": "core.cache.SQLiteCache",
+            "LOCATION": "/var/cache/yatube/cache.sqlite3",
+            "OPTIONS": {"MAX_ENTRIES": 100000, "MAX_SIZE": 256 * 2 ** 20},
+        },
+    }
+
+incr и add атомарны между процессами (BEGIN IMMEDIATE). При
+превышении MAX_ENTRIES или MAX_SIZE (байт) вытесняются давно не
+читанные записи. get_or_set защищён от лавины пересчётов: значение
+считает один процесс, остальные ждут его до LOCK_TIMEOUT секунд.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS cache ("
+    " key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL,"
+    " accessed REAL NOT NULL, size INTEGER NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)",
+    "CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)",
+)
+# Время чтения обновляется не чаще раза в столько секунд, чтобы
+# чтения не превращались в записи.
+ACCESS_RESOLUTION: float = 10.0
+CULL_CHECK_EVERY: int = 100
+LOCK_POLL: float = 0.05
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self.path = location
+        self.max_size = options.get("MAX_SIZE")
+        self.lock_timeout = options.get("LOCK_TIMEOUT", 10)
+        self.busy_timeout = options.get("BUSY_TIMEOUT", 5)
+        self.local = threading.local()
+        self.sets = 0
+
+    @property
+    def db(self):
+        """Своё соединение у каждого потока; после fork — новое."""
+        db = getattr(self.local, "db", None)
+        if db is None or self.local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(
+                self.path, timeout=self.busy_timeout, isolation_level=None,
+                check_same_thread=False,
+            )
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            for statement in SCHEMA:
+                db.execute(statement)
+            self.local.db = db
+            self.local.pid = os.getpid()
+        return db
+
+    def key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def expires(self, timeout):
+        """Момент истечения (time.time()) или None для вечной записи."""
+        return self.get_backend_timeout(timeout)
+
+    def write(self):
+        """Транзакция с блокировкой записи сразу: атомарный
+        read-modify-write между процессами."""
+        return Transaction(self.db)
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        if not keys:
+            return {}
+        by_key = {self.key(key, version): key for key in keys}
+        now = time.time()
+        rows = self.db.execute(
+            "SELECT key, value, expires, accessed FROM cache "
+            f"WHERE key IN ({', '.join('?' * len(by_key))})",
+            list(by_key),
+        ).fetchall()
+        found = {}
+        expired = []
+        stale = []
+        for key, value, expires, accessed in rows:
+            if expires is not None and expires <= now:
+                expired.append(key)
+                continue
+            if now - accessed > ACCESS_RESOLUTION:
+                stale.append(key)
+            found[by_key[key]] = pickle.loads(value)
+        if expired:
+            self.db.executemany(
+                "DELETE FROM cache WHERE key = ? AND expires <= ?",
+                [(key, now) for key in expired],
+            )
+        if stale:
+            self.db.executemany(
+                "UPDATE cache SET accessed = ? WHERE key = ?",
+                [(now, key) for key in stale],
+            )
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.expires(timeout)
+        now = time.time()
+        rows = []
+        for key, value in data.items():
+            blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            rows.append(
+                (self.key(key, version), blob, expires, now, len(blob))
+            )
+        self.db.executemany(
+            "INSERT OR REPLACE INTO cache "
+            "(key, value, expires, accessed, size) VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+        self.maybe_cull(len(rows))
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.key(key, version)
+        blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        with self.write() as db:
+            db.execute(
+                "DELETE FROM cache WHERE key = ? AND expires <= ?", (key, now)
+            )
+            added = db.execute(
+                "INSERT OR IGNORE INTO cache "
+                "(key, value, expires, accessed, size) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, self.expires(timeout), now, len(blob)),
+            ).rowcount
+        if added:
+            self.maybe_cull(1)
+        return bool(added)
+
+    def incr(self, key, delta=1, version=None):
+        key = self.key(key, version)
+        now = time.time()
+        with self.write() as db:
+            row = db.execute(
+                "SELECT value FROM cache WHERE key = ? "
+                "AND (expires IS NULL OR expires > ?)",
+                (key, now),
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            db.execute(
+                "UPDATE cache SET value = ?, size = ?, accessed = ? "
+                "WHERE key = ?",
+                (blob, len(blob), now, key),
+            )
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return bool(self.db.execute(
+            "UPDATE cache SET expires = ? WHERE key = ? "
+            "AND (expires IS NULL OR expires > ?)",
+            (self.expires(timeout), self.key(key, version), time.time()),
+        ).rowcount)
+
+    def has_key(self, key, version=None):
+        return self.db.execute(
+            "SELECT 1 FROM cache WHERE key = ? "
+            "AND (expires IS NULL OR expires > ?)",
+            (self.key(key, version), time.time()),
+        ).fetchone() is not None
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        self.db.executemany(
+            "DELETE FROM cache WHERE key = ?",
+            [(self.key(key, version),) for key in keys],
+        )
+
+    def clear(self):
+        self.db.execute("DELETE FROM cache")
+
+    def close(self, **kwargs):
+        # Соединения живут всё время процесса, как у LocMemCache.
+        pass
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT,
+                   version=None):
+        """get_or_set, где пропавшее значение пересчитывает один процесс.
+
+        Остальные, пока держится замок, ждут готового значения; если
+        дождаться не вышло, считают сами.
+        """
+        value = self.get(key, version=version)
+        if value is not None or default is None:
+            return value
+        lock = f"{key}:lock"
+        deadline = time.monotonic() + self.lock_timeout
+        while not self.add(lock, 1, self.lock_timeout, version=version):
+            time.sleep(LOCK_POLL)
+            value = self.get(key, version=version)
+            if value is not None:
+                return value
+            if time.monotonic() > deadline:
+                break
+        try:
+            value = default() if callable(default) else default
+            self.set(key, value, timeout, version=version)
+        finally:
+            self.delete(lock, version=version)
+        return value
+
+    def maybe_cull(self, count):
+        self.sets += count
+        if self.sets < CULL_CHECK_EVERY:
+            return
+        self.sets = 0
+        self.cull()
+
+    def cull(self):
+        """Убирает истёкшие записи, затем давно не читанные сверх
+        MAX_ENTRIES и MAX_SIZE."""
+        db = self.db
+        db.execute("DELETE FROM cache WHERE expires <= ?", (time.time(),))
+        entries, size = db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache"
+        ).fetchone()
+        excess = 0
+        if entries > self._max_entries:
+            # Как LocMemCache: разом освобождаем 1/CULL_FREQUENCY места.
+            excess = entries - self._max_entries
+            excess += self._max_entries // self._cull_frequency
+        if excess:
+            db.execute(
+                "DELETE FROM cache WHERE key IN ("
+                "SELECT key FROM cache ORDER BY accessed LIMIT ?)",
+                (excess,),
+            )
+            size = db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM cache"
+            ).fetchone()[0]
+        if self.max_size is None or size <= self.max_size:
+            return
+        freed = 0
+        victims = []
+        target = size - self.max_size * (1 - 1 / self._cull_frequency)
+        cursor = db.execute("SELECT key, size FROM cache ORDER BY accessed")
+        for key, row_size in cursor:
+            victims.append((key,))
+            freed += row_size
+            if freed >= target:
+                break
+        cursor.close()
+        db.executemany("DELETE FROM cache WHERE key = ?", victims)
+
+
+class Transaction:
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.db.execute("ROLLBACK" if exc_type else "COMMIT")
@@ -0,0 +1,7 @@
+from django.conf import settings
+
+
+def live_updates(request):
+    return {
+        "live_updates": getattr(settings, "POSTS_LIVE_UPDATES", False),
+    }
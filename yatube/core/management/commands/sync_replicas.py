@@ -0,0 +1,33 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Копирует основную базу SQLite в файлы реплик из "
+        "DATABASE_REPLICAS — замена репликации при локальной проверке."
+    )
+
+    def handle(self, *args, **options):
+        replicas = getattr(settings, "DATABASE_REPLICAS", [])
+        if not replicas:
+            raise CommandError("DATABASE_REPLICAS пуст")
+        for alias in ["default", *replicas]:
+            if connections[alias].vendor != "sqlite":
+                raise CommandError(f"{alias}: поддерживается только SQLite")
+        primary = sqlite3.connect(connections["default"].settings_dict["NAME"])
+        with primary:
+            for alias in replicas:
+                connections[alias].close()
+                replica = sqlite3.connect(
+                    connections[alias].settings_dict["NAME"]
+                )
+                with replica:
+                    primary.backup(replica)
+                replica.close()
+                self.stdout.write(f"{alias}: скопирована")
+        primary.close()
+        self.stdout.write(self.style.SUCCESS("Реплики обновлены"))
@@ -0,0 +1,235 @@
+"""Метрики запросов в памяти процесса: время, SQL, кэш и шаблоны.
+
+Сбор идёт только внутри запроса, который обслуживает MetricsMiddleware;
+кэш и шаблоны инструментируются так же, как это делает debug_toolbar —
+обёрткой методов при первом создании middleware.
+"""
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template.base import Template
+
+SECONDS_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+MAX_CAPTURED_QUERIES: int = 200
+
+_local = threading.local()
+_installed = False
+_MISS = object()
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+
+class Registry:
+    HISTOGRAMS = {
+        "yatube_request_seconds": (
+            "Время обработки запроса", SECONDS_BUCKETS),
+        "yatube_db_queries": ("SQL-запросов за запрос", QUERY_BUCKETS),
+        "yatube_db_seconds": ("Время SQL за запрос", SECONDS_BUCKETS),
+        "yatube_template_seconds": (
+            "Время рендера шаблонов за запрос", SECONDS_BUCKETS),
+    }
+    COUNTERS = {
+        "yatube_cache_hits_total": "Попаданий в кэш",
+        "yatube_cache_misses_total": "Промахов кэша",
+    }
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.histograms = {}
+        self.counters = {}
+
+    def record(self, view, elapsed, stats):
+        values = {
+            "yatube_request_seconds": elapsed,
+            "yatube_db_queries": stats.queries,
+            "yatube_db_seconds": stats.db_time,
+            "yatube_template_seconds": stats.template_time,
+        }
+        with self.lock:
+            for metric, value in values.items():
+                histogram = self.histograms.get((metric, view))
+                if histogram is None:
+                    histogram = Histogram(self.HISTOGRAMS[metric][1])
+                    self.histograms[(metric, view)] = histogram
+                histogram.observe(value)
+            for metric, value in (
+                ("yatube_cache_hits_total", stats.cache_hits),
+                ("yatube_cache_misses_total", stats.cache_misses),
+            ):
+                self.counters[(metric, view)] = (
+                    self.counters.get((metric, view), 0) + value
+                )
+
+    def render(self):
+        """Все метрики в текстовом формате Prometheus."""
+        lines = []
+        with self.lock:
+            for metric, (help_text, _) in self.HISTOGRAMS.items():
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} histogram")
+                for (name, view), histogram in sorted(
+                    self.histograms.items()
+                ):
+                    if name != metric:
+                        continue
+                    for bound, total in histogram.cumulative():
+                        lines.append(
+                            f'{metric}_bucket{{view="{view}",le="{bound}"}} '
+                            f'{total}'
+                        )
+                    lines.append(
+                        f'{metric}_bucket{{view="{view}",le="+Inf"}} '
+                        f'{histogram.count}'
+                    )
+                    lines.append(
+                        f'{metric}_sum{{view="{view}"}} {histogram.sum}'
+                    )
+                    lines.append(
+                        f'{metric}_count{{view="{view}"}} {histogram.count}'
+                    )
+            for metric, help_text in self.COUNTERS.items():
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} counter")
+                for (name, view), value in sorted(self.counters.items()):
+                    if name == metric:
+                        lines.append(f'{metric}{{view="{view}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.cache_depth = 0
+        self.sql = []
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.queries += 1
+            self.db_time += duration
+            if len(self.sql) < MAX_CAPTURED_QUERIES:
+                self.sql.append((duration, sql))
+
+
+def start_request():
+    _local.stats = RequestStats()
+    return _local.stats
+
+
+def finish_request():
+    _local.stats = None
+
+
+def current():
+    return getattr(_local, "stats", None)
+
+
+def instrument_cache(cache_class):
+    original_get = cache_class.get
+    original_get_many = cache_class.get_many
+
+    @wraps(original_get)
+    def get(self, key, default=None, version=None):
+        stats = current()
+        if stats is None or stats.cache_depth:
+            return original_get(self, key, default, version=version)
+        # Часть бэкендов реализует get() через get_many() и наоборот.
+        stats.cache_depth += 1
+        try:
+            value = original_get(self, key, _MISS, version=version)
+        finally:
+            stats.cache_depth -= 1
+        if value is _MISS:
+            stats.cache_misses += 1
+            return default
+        stats.cache_hits += 1
+        return value
+
+    @wraps(original_get_many)
+    def get_many(self, keys, version=None):
+        stats = current()
+        if stats is None or stats.cache_depth:
+            return original_get_many(self, keys, version=version)
+        keys = list(keys)
+        stats.cache_depth += 1
+        try:
+            values = original_get_many(self, keys, version=version)
+        finally:
+            stats.cache_depth -= 1
+        stats.cache_hits += len(values)
+        stats.cache_misses += len(keys) - len(values)
+        return values
+
+    cache_class.get = get
+    cache_class.get_many = get_many
+
+
+def instrument_templates():
+    original_render = Template.render
+
+    @wraps(original_render)
+    def render(self, context):
+        stats = current()
+        if stats is None:
+            return original_render(self, context)
+        # Вложенные include считаются в рамках внешнего шаблона.
+        stats.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return original_render(self, context)
+        finally:
+            stats.template_depth -= 1
+            if not stats.template_depth:
+                stats.template_time += time.perf_counter() - started
+
+    Template.render = render
+
+
+def install():
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    for cache_class in {type(caches[alias]) for alias in settings.CACHES}:
+        instrument_cache(cache_class)
+    instrument_templates()
@@ -0,0 +1,81 @@
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics, routers
+
+logger = logging.getLogger("yatube.slow_requests")
+
+
+class MetricsMiddleware:
+    """Пишет время, SQL, кэш и рендер шаблонов по каждой view в метрики.
+
+    Медленные запросы (дольше METRICS_SLOW_REQUEST_SECONDS) с частотой
+    METRICS_SLOW_REQUEST_SAMPLE_RATE попадают в лог вместе с их SQL.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        metrics.install()
+
+    def __call__(self, request):
+        stats = metrics.start_request()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(stats.record_query)
+                    )
+                response = self.get_response(request)
+        finally:
+            metrics.finish_request()
+        elapsed = time.perf_counter() - started
+        match = request.resolver_match
+        view = match.view_name if match else "unresolved"
+        metrics.registry.record(view, elapsed, stats)
+        self.log_slow_request(request, view, elapsed, stats)
+        return response
+
+    def log_slow_request(self, request, view, elapsed, stats):
+        threshold = getattr(settings, "METRICS_SLOW_REQUEST_SECONDS", 1.0)
+        rate = getattr(settings, "METRICS_SLOW_REQUEST_SAMPLE_RATE", 0.1)
+        if elapsed < threshold or random.random() >= rate:
+            return
+        queries = "\n".join(
+            f"  {duration * 1000:.1f} ms: {sql}"
+            for duration, sql in stats.sql
+        )
+        logger.warning(
+            "Медленный запрос %s %s (%s): %.3f s, SQL: %d за %.3f s\n%s",
+            request.method, request.get_full_path(), view, elapsed,
+            stats.queries, stats.db_time, queries,
+        )
+
+
+class ReplicaMiddleware:
+    """Закрепляет читателя за основной базой на время репликации после
+    запроса, который что-то записал (см. core.routers)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        routers.start_request(
+            routers.REPLICA_STICKY_COOKIE in request.COOKIES
+        )
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = routers.finish_request()
+        if wrote:
+            response.set_cookie(
+                routers.REPLICA_STICKY_COOKIE, "1",
+                max_age=routers.REPLICA_STICKY_SECONDS,
+                httponly=True, samesite="Lax",
+            )
+        return response
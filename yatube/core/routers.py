@@ -0,0 +1,77 @@
+"""Чтение лент с реплик базы и запись в основную.
+
+Реплики — алиасы из settings.DATABASE_REPLICAS. С реплики читают только
+view, обёрнутые в use_replica, и только пока у читателя нет cookie
+REPLICA_STICKY_COOKIE: её ставит ReplicaMiddleware после любого запроса,
+который что-то записал, чтобы автор сразу видел свой пост или
+комментарий, не дожидаясь репликации.
+"""
+import random
+import threading
+from functools import wraps
+
+from django.conf import settings
+
+REPLICA_STICKY_COOKIE: str = "primary_db"
+# Сколько реплика может отставать от основной базы.
+REPLICA_STICKY_SECONDS: int = 10
+
+_local = threading.local()
+
+
+def get_replicas():
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+
+def start_request(sticky):
+    _local.sticky = sticky
+    _local.replica = False
+    _local.wrote = False
+
+
+def finish_request():
+    """Было ли в запросе что-то записано."""
+    wrote = getattr(_local, "wrote", False)
+    start_request(False)
+    return wrote
+
+
+def reading_from_replica():
+    return bool(
+        get_replicas()
+        and getattr(_local, "replica", False)
+        and not getattr(_local, "sticky", False)
+    )
+
+
+def use_replica(view):
+    """Разрешает view читать с реплики."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return view(request, *args, **kwargs)
+        _local.replica = True
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _local.replica = False
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if reading_from_replica():
+            return random.choice(get_replicas())
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        _local.wrote = True
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # На репликах те же данные, что и в основной базе.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема приходит на реплики вместе с данными.
+        return db not in get_replicas()
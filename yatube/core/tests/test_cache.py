@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from core.cache import SQLiteCache
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.cache = self.make_cache()
+
+    def make_cache(self, **options):
+        return SQLiteCache(
+            os.path.join(self.directory, "cache.sqlite3"),
+            {"OPTIONS": options},
+        )
+
+    def test_shared_between_instances(self):
+        """Записи видны другому экземпляру (процессу) с тем же файлом."""
+        self.cache.set("key", {"value": 1})
+        other = self.make_cache()
+        self.assertEqual(other.get("key"), {"value": 1})
+        self.assertEqual(other.get_many(["key", "missing"]), {
+            "key": {"value": 1}
+        })
+        other.delete("key")
+        self.assertIsNone(self.cache.get("key"))
+
+    def test_expiry_and_add(self):
+        """Истёкшая запись не читается, add её заменяет."""
+        self.cache.set("key", "old", 0.05)
+        self.assertFalse(self.cache.add("key", "new"))
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get("key"))
+        self.assertTrue(self.cache.add("key", "new"))
+        self.assertEqual(self.cache.get("key"), "new")
+
+    def test_incr_is_atomic(self):
+        """Параллельные incr из разных соединений не теряются."""
+        self.cache.set("counter", 0, None)
+
+        def bump():
+            cache = self.make_cache()
+            for _ in range(50):
+                cache.incr("counter")
+
+        threads = [threading.Thread(target=bump) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.cache.get("counter"), 200)
+        with self.assertRaises(ValueError):
+            self.cache.incr("missing")
+
+    def test_lru_eviction(self):
+        """Вытесняются давно не читанные записи."""
+        cache = self.make_cache(MAX_ENTRIES=3, CULL_FREQUENCY=3)
+        for i in range(4):
+            cache.set(f"key{i}", i)
+            cache.db.execute(
+                "UPDATE cache SET accessed = ? WHERE key = ?",
+                (i, cache.make_key(f"key{i}")),
+            )
+        cache.get("key0")
+        cache.cull()
+        self.assertEqual(
+            sorted(cache.get_many([f"key{i}" for i in range(4)])),
+            ["key0", "key3"],
+        )
+
+    def test_size_eviction(self):
+        """Записи сверх MAX_SIZE вытесняются."""
+        cache = self.make_cache(MAX_SIZE=5000)
+        for i in range(10):
+            cache.set(f"key{i}", "x" * 1000)
+        cache.cull()
+        total = cache.db.execute("SELECT SUM(size) FROM cache").fetchone()[0]
+        self.assertLessEqual(total, 5000)
+
+    def test_get_or_set_computes_once(self):
+        """Пропавшее значение пересчитывает один поток, остальные ждут."""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return "page"
+
+        results = []
+
+        def read():
+            results.append(self.make_cache().get_or_set("page", compute))
+
+        threads = [threading.Thread(target=read) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ["page"] * 4)
+        self.assertEqual(len(calls), 1)
@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.metrics import registry
+from posts.models import Post
+
+User = get_user_model()
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.clear()
+        self.user = User.objects.create(username="metrics_reader")
+        Post.objects.create(text="Тестовый пост", author=self.user)
+        self.admin = User.objects.create(
+            username="metrics_admin", is_staff=True
+        )
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+
+    def test_metrics_by_view(self):
+        """Метрики собираются по имени view в формате Prometheus."""
+        self.guest_client.get(reverse("posts:index"))
+        self.guest_client.get(reverse("posts:index"))
+        response = self.admin_client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn(
+            'yatube_request_seconds_count{view="posts:index"} 2', body
+        )
+        self.assertIn('yatube_db_queries_bucket{view="posts:index"', body)
+        self.assertIn('yatube_cache_hits_total{view="posts:index"}', body)
+
+    def test_metrics_only_for_staff(self):
+        """Метрики недоступны гостю и обычному пользователю."""
+        for client in (self.guest_client, self.authorized_client):
+            with self.subTest(client=client):
+                response = client.get(reverse("metrics"))
+                self.assertEqual(response.status_code, 302)
+
+    @override_settings(
+        METRICS_SLOW_REQUEST_SECONDS=0,
+        METRICS_SLOW_REQUEST_SAMPLE_RATE=1,
+    )
+    def test_slow_request_log(self):
+        """Медленный запрос попадает в лог вместе со своим SQL."""
+        with self.assertLogs("yatube.slow_requests", "WARNING") as logs:
+            self.guest_client.get(reverse("posts:index"))
+        self.assertIn("posts:index", logs.output[0])
+        self.assertIn("SELECT", logs.output[0])
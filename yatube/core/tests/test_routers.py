@@ -0,0 +1,63 @@
+import random
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import routers
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=["default"], POSTS_FEED_CACHE=True)
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="replica_reader")
+        self.post = Post.objects.create(text="Пост", author=self.user)
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        patcher = mock.patch.object(
+            routers.random, "choice", wraps=random.choice
+        )
+        self.choice = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_feeds_read_from_replica(self):
+        """Ленты читают с реплики, остальные view — с основной базы."""
+        self.guest_client.get(reverse("posts:index"))
+        self.assertTrue(self.choice.called)
+        self.choice.reset_mock()
+        self.authorized_client.get(
+            reverse("posts:post_edit", kwargs={"post_id": self.post.pk})
+        )
+        self.assertFalse(self.choice.called)
+
+    def test_sticky_after_write(self):
+        """После записи читатель какое-то время читает с основной базы."""
+        url = reverse("posts:post_detail", kwargs={"post_id": self.post.pk})
+        self.authorized_client.get(url)
+        self.assertTrue(self.choice.called)
+        response = self.authorized_client.post(
+            reverse("posts:add_comment", kwargs={"post_id": self.post.pk}),
+            {"text": "Комментарий"},
+        )
+        cookie = response.cookies[routers.REPLICA_STICKY_COOKIE]
+        self.assertEqual(cookie["max-age"], routers.REPLICA_STICKY_SECONDS)
+        self.choice.reset_mock()
+        response = self.authorized_client.get(url)
+        self.assertFalse(self.choice.called)
+        self.assertContains(response, "Комментарий")
+
+    def test_lagging_replica_not_cached(self):
+        """Сразу после правки страницу с реплики не кэшируют и не
+        помечают ETag."""
+        response = self.guest_client.get(reverse("posts:index"))
+        self.assertNotIn("ETag", response)
+        with mock.patch.object(routers, "REPLICA_STICKY_SECONDS", 0):
+            response = self.guest_client.get(reverse("posts:index"))
+        self.assertIn("ETag", response)
@@ -1,5 +1,9 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse
 from django.shortcuts import render
 
+from .metrics import registry
+
 
 def page_not_found(request, exception):
     # Переменная exception содержит отладочную информацию;
@@ -23,3 +27,10 @@ def page_500_found(request):
         {'patch': request.path},
         status=500
     )
+
+
+@staff_member_required
+def metrics_view(request):
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4"
+    )
@@ -1,14 +1,62 @@
 from django.contrib import admin
+from django.db import connections, router
+from django.db.models import Max
+
+from . import counters
 from .models import Post, Group, Comment, Follow
+from .paginators import EstimatedCountPaginator
+
+
+def estimate_rows(model):
+    """Примерное число строк без COUNT(*): статистика PostgreSQL или
+    наибольший id (сверху, если строки удаляли)."""
+    connection = connections[router.db_for_read(model)]
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class "
+                "WHERE oid = %s::regclass",
+                [model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        # -1 или 0 у таблицы, которую ещё не анализировали.
+        if row and row[0] > 0:
+            return row[0]
+    return model.objects.aggregate(last=Max("pk"))["last"] or 0
+
 
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist для таблиц на миллионы строк: оценка числа строк
+    вместо COUNT(*) и без второго COUNT для «показать все»."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
-class PostAdmin(admin.ModelAdmin):
+    def estimated_count(self):
+        return estimate_rows(self.model)
+
+    def get_paginator(self, request, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True):
+        return self.paginator(
+            queryset, per_page, orphans=orphans,
+            allow_empty_first_page=allow_empty_first_page,
+            estimate=self.estimated_count,
+        )
+
+
+class PostAdmin(LargeTableAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
-    list_editable = ('group',)
+    # Диапазон дат читается по индексу post_date_idx.
+    date_hierarchy = 'pub_date'
+    raw_id_fields = ('author',)
+    autocomplete_fields = ('group',)
     empty_value_display = '-пусто-'
 
+    def estimated_count(self):
+        return counters.get_count(counters.TOTAL_POSTS)
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = ('pk', 'title', 'slug', 'description')
@@ -16,14 +64,18 @@ class GroupAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     list_display = ('text', 'post', 'author')
+    list_select_related = ('post', 'author')
     search_fields = ('text',)
+    raw_id_fields = ('post', 'author')
     empty_value_display = '-пусто-'
 
 
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(LargeTableAdmin):
     list_display = ('user', 'author')
+    list_select_related = ('user', 'author')
+    raw_id_fields = ('user', 'author')
 
 
 admin.site.register(Post, PostAdmin)
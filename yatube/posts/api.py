@@ -0,0 +1,94 @@
+"""JSON-версии лент index, group_posts и profile для мобильных клиентов.
+
+Запросы и курсорная пагинация те же, что у HTML-страниц; ETag и
+Last-Modified берутся из поколений лент, так что ответ 304 обходится
+без запросов к базе и без сериализации.
+"""
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.views.decorators.http import condition, require_GET
+
+from core.routers import use_replica
+
+from . import counters
+from .caching import GLOBAL_FEED, author_feed, feed_conditions, group_feed
+from .models import Group, Post, User
+from .views import get_feed_page
+
+
+def serialize_post(request, post):
+    image = None
+    if post.image:
+        image = request.build_absolute_uri(post.image.url)
+    return {
+        "id": post.pk,
+        "text": post.text,
+        "author": post.author.username,
+        "group": post.group.slug if post.group else None,
+        "pub_date": post.pub_date.isoformat(),
+        "image": image,
+        "url": request.build_absolute_uri(
+            reverse("posts:post_detail", kwargs={"post_id": post.pk})
+        ),
+    }
+
+
+def feed_response(request, posts, **extra):
+    page_obj = get_feed_page(request, posts)
+    return JsonResponse(
+        {
+            **extra,
+            "results": [serialize_post(request, post) for post in page_obj],
+            "next_cursor": page_obj.next_cursor,
+            "previous_cursor": page_obj.previous_cursor,
+        },
+        json_dumps_params={"ensure_ascii": False},
+    )
+
+
+@use_replica
+@require_GET
+@condition(**feed_conditions(lambda: [GLOBAL_FEED]))
+def index(request):
+    return feed_response(
+        request, Post.objects.feed(),
+        count=counters.get_count(counters.TOTAL_POSTS),
+    )
+
+
+@use_replica
+@require_GET
+@condition(**feed_conditions(lambda slug: [group_feed(slug)]))
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return feed_response(
+        request, group.posts.feed(),
+        group={
+            "slug": group.slug,
+            "title": group.title,
+            "description": group.description,
+        },
+        count=counters.get_count(counters.GROUP_POSTS, group.pk),
+    )
+
+
+@use_replica
+@require_GET
+@condition(**feed_conditions(lambda username: [author_feed(username)]))
+def profile(request, username):
+    author = get_object_or_404(User, username=username)
+    author_counts = counters.get_object_counts(
+        (counters.AUTHOR_POSTS, counters.FOLLOWERS, counters.FOLLOWING),
+        author.pk,
+    )
+    return feed_response(
+        request, author.posts.feed(),
+        author={
+            "username": author.username,
+            "full_name": author.get_full_name(),
+            "followers": author_counts[counters.FOLLOWERS],
+            "following": author_counts[counters.FOLLOWING],
+        },
+        count=author_counts[counters.AUTHOR_POSTS],
+    )
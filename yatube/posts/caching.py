@@ -0,0 +1,253 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.utils.cache import patch_vary_headers
+
+from core import routers
+
+from .paginators import CURSOR_PARAM, decode_cursor
+
+# Имена фрагментов {% cache %} с карточкой поста в шаблонах лент.
+POST_CARD_FRAGMENTS = (
+    "post_card_index",
+    "post_card_group",
+    "post_card_profile",
+    "post_card_follow",
+)
+
+
+# Поля автора и группы, которые показывает карточка: их правка сдвигает
+# версию карточек автора или группы, а не строки всех их постов.
+AUTHOR_CARD_FIELDS = ("username", "first_name", "last_name")
+GROUP_CARD_FIELDS = ("slug",)
+
+
+def author_cards(author_id):
+    return f"author-cards:{author_id}"
+
+
+def group_cards(group_id):
+    return f"group-cards:{group_id}"
+
+
+def card_versions(posts):
+    """{id поста: версия карточки} по поколениям автора и группы — одним
+    чтением кэша на все посты."""
+    names = {}
+    for post in posts:
+        names[post.pk] = [author_cards(post.author_id)]
+        if post.group_id:
+            names[post.pk].append(group_cards(post.group_id))
+    unique = list({name for feeds in names.values() for name in feeds})
+    generations = dict(zip(unique, get_generations(unique)))
+    return {
+        pk: ".".join(str(generations[name]) for name in feeds)
+        for pk, feeds in names.items()
+    }
+
+
+def post_card_keys(post):
+    """Ключи закэшированных карточек текущей версии поста."""
+    vary_on = [
+        post.pk, post.updated.isoformat(), card_versions([post])[post.pk]
+    ]
+    return [
+        make_template_fragment_key(fragment, vary_on)
+        for fragment in POST_CARD_FRAGMENTS
+    ]
+
+
+def invalidate_post_cards(post):
+    cache.delete_many(post_card_keys(post))
+
+
+FEED_CACHE_TIMEOUT: int = 5 * 60
+# Поколение "site" входит в ключ каждой ленты: его сдвигают редкие
+# правки групп и пользователей, которые видны сразу на многих лентах.
+SITE_FEED: str = "site"
+GLOBAL_FEED: str = "global"
+
+
+def group_feed(slug):
+    return f"group:{slug}"
+
+
+def author_feed(username):
+    return f"author:{username}"
+
+
+def post_feed(post_id):
+    """Страница поста: её сдвигают комментарии."""
+    return f"post:{post_id}"
+
+
+def generation_key(feed):
+    return f"feed-generation:{feed}"
+
+
+def modified_key(feed):
+    return f"feed-modified:{feed}"
+
+
+def initial_generation():
+    # Начинаем с текущего времени, а не с нуля: если счётчик вытеснят
+    # из кэша, новое поколение не совпадёт ни с одним из прежних.
+    return time.time_ns() // 1000
+
+
+def get_generations(feeds):
+    keys = [generation_key(feed) for feed in feeds]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, initial_generation(), None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def bump_generation(*feeds):
+    for feed in feeds:
+        try:
+            cache.incr(generation_key(feed))
+        except ValueError:
+            cache.set(generation_key(feed), initial_generation(), None)
+    cache.set_many({modified_key(feed): time.time() for feed in feeds}, None)
+
+
+def get_last_modified(feeds):
+    """Время последней правки лент (для Last-Modified).
+
+    Если отметку вытеснили из кэша, её место занимает текущее время:
+    клиенты один раз получат страницу заново, но не устаревшую.
+    """
+    keys = [modified_key(feed) for feed in feeds]
+    times = cache.get_many(keys)
+    for key in keys:
+        if key not in times:
+            cache.add(key, time.time(), None)
+            times[key] = cache.get(key)
+    return datetime.fromtimestamp(max(times.values()), timezone.utc)
+
+
+def replica_may_lag(feeds):
+    """Реплика, с которой читает запрос, могла ещё не получить последнюю
+    правку лент. Такую страницу нельзя класть в кэш и помечать ETag
+    нового поколения: устаревшее содержимое прожило бы до следующей
+    правки."""
+    if not routers.reading_from_replica():
+        return False
+    age = time.time() - get_last_modified(feeds).timestamp()
+    return age < routers.REPLICA_STICKY_SECONDS
+
+
+def feed_cache_enabled():
+    """Кэш страниц и валидаторы по поколениям включены (POSTS_FEED_CACHE):
+    только с кэшем, общим для всех процессов."""
+    return getattr(settings, "POSTS_FEED_CACHE", False)
+
+
+def cached_page_path(request):
+    """Путь страницы для ключа кэша или None, если её не кэшировать.
+
+    Кэшируются только страницы лент: адрес и курсор. Поиск и прочие
+    параметры строки запроса аноним может перебирать без конца, и
+    каждый вариант занял бы место в кэше.
+    """
+    if set(request.GET) - {CURSOR_PARAM}:
+        return None
+    cursor = request.GET.get(CURSOR_PARAM)
+    if cursor is not None and decode_cursor(cursor) is None:
+        return None
+    return f"{request.path}?{cursor or ''}"
+
+
+def cache_feed_page(feeds):
+    """Кэширует страницу ленты для анонимов до смены поколения ленты.
+
+    feeds(**kwargs) получает аргументы view и возвращает имена лент,
+    поколения которых входят в ключ. Удаление или публикация поста
+    сдвигает поколение, поэтому удалённые посты не остаются в кэше.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            path = cached_page_path(request)
+            if (request.method != "GET" or request.user.is_authenticated
+                    or path is None or not feed_cache_enabled()):
+                return view(request, *args, **kwargs)
+            names = [SITE_FEED, *feeds(**kwargs)]
+            if replica_may_lag(names):
+                return view(request, *args, **kwargs)
+            generations = get_generations(names)
+            key = "feed-page:{}:{}".format(
+                hashlib.md5(path.encode()).hexdigest(),
+                ".".join(map(str, generations)),
+            )
+
+            def render():
+                response = view(request, *args, **kwargs)
+                patch_vary_headers(response, ("Cookie",))
+                return response
+
+            # Ленты отдают только 200 (404 — исключением, оно не
+            # кэшируется). get_or_set общего кэша (core.cache) считает
+            # страницу в одном процессе, пока остальные её ждут.
+            return cache.get_or_set(key, render, FEED_CACHE_TIMEOUT)
+        return wrapper
+    return decorator
+
+
+def form_token(request):
+    """Короткий отпечаток CSRF-токена читателя: вход, выход и ротация
+    токена меняют его, и страница с формой не отдаётся из кэша браузера
+    со старым csrfmiddlewaretoken."""
+    if settings.CSRF_USE_SESSIONS:
+        value = request.COOKIES.get(settings.SESSION_COOKIE_NAME, "")
+    else:
+        value = request.COOKIES.get(settings.CSRF_COOKIE_NAME, "")
+    return hashlib.md5(value.encode()).hexdigest()[:8]
+
+
+def feed_conditions(feeds, per_user=False, forms=False):
+    """etag_func и last_modified_func для condition() по поколениям лент.
+
+    feeds(**kwargs) — как у cache_feed_page; None значит, что страницы
+    нет и проверять нечего. Поколения сдвигаются при любой правке,
+    видимой в ленте, поэтому валидаторы обходятся без запросов к базе;
+    без общего кэша (POSTS_FEED_CACHE) их нет вовсе.
+    per_user добавляет пользователя в ETag для страниц, которые выглядят
+    по-разному для разных читателей; Last-Modified таким страницам не
+    отдаётся — по одной дате не отличить, что читатель сменился
+    (например, вышел из аккаунта). forms добавляет в ETag отпечаток
+    CSRF-токена для страниц с формами POST.
+    """
+    def etag(request, *args, **kwargs):
+        if not feed_cache_enabled():
+            return None
+        names = feeds(**kwargs)
+        if names is None or replica_may_lag([SITE_FEED, *names]):
+            return None
+        generations = get_generations([SITE_FEED, *names])
+        tag = ".".join(map(str, generations))
+        if per_user:
+            tag += f"-u{request.user.pk or 0}"
+        if forms:
+            tag += f"-f{form_token(request)}"
+        return tag
+
+    def last_modified(request, *args, **kwargs):
+        if not feed_cache_enabled():
+            return None
+        names = feeds(**kwargs)
+        if names is None or replica_may_lag([SITE_FEED, *names]):
+            return None
+        return get_last_modified([SITE_FEED, *names])
+
+    if per_user or forms:
+        return {"etag_func": etag}
+    return {"etag_func": etag, "last_modified_func": last_modified}
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+from users.checks import LOCAL_CACHE_BACKENDS
+
+
+@register()
+def check_feed_cache(app_configs, **kwargs):
+    """Кэш страниц лент и ETag требуют кэша, общего для процессов."""
+    if settings.CACHES["default"]["BACKEND"] not in LOCAL_CACHE_BACKENDS:
+        return []
+    if not getattr(settings, "POSTS_FEED_CACHE", False):
+        return []
+    return [Error(
+        "Кэш лент в кэше одного процесса: удалённые посты и 304 на "
+        "изменённые ленты из других процессов.",
+        hint="Настройте общий кэш (core.cache.SQLiteCache) или "
+             "POSTS_FEED_CACHE = False.",
+        id="posts.E001",
+    )]
@@ -0,0 +1,93 @@
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from .models import Comment, Counter, Follow, Post
+
+TOTAL_POSTS: str = "posts"
+AUTHOR_POSTS: str = "author_posts"
+GROUP_POSTS: str = "group_posts"
+POST_COMMENTS: str = "post_comments"
+FOLLOWERS: str = "followers"
+FOLLOWING: str = "following"
+
+
+def increment(kind, object_id=0, delta=1):
+    """Атомарно прибавляет delta к счётчику, создавая его при нужде."""
+    with transaction.atomic():
+        updated = Counter.objects.filter(
+            kind=kind, object_id=object_id
+        ).update(value=F("value") + delta)
+        if not updated:
+            counter, created = Counter.objects.get_or_create(
+                kind=kind, object_id=object_id, defaults={"value": delta}
+            )
+            if not created:
+                Counter.objects.filter(pk=counter.pk).update(
+                    value=F("value") + delta
+                )
+
+
+def get_count(kind, object_id=0):
+    value = Counter.objects.filter(
+        kind=kind, object_id=object_id
+    ).values_list("value", flat=True).first()
+    return value or 0
+
+
+def get_counts(kind, object_ids):
+    """Словарь object_id -> значение для нескольких объектов сразу."""
+    counts = dict.fromkeys(object_ids, 0)
+    counts.update(Counter.objects.filter(
+        kind=kind, object_id__in=object_ids
+    ).values_list("object_id", "value"))
+    return counts
+
+
+def get_object_counts(kinds, object_id):
+    """Несколько счётчиков одного объекта одним запросом."""
+    counts = dict.fromkeys(kinds, 0)
+    counts.update(Counter.objects.filter(
+        kind__in=kinds, object_id=object_id
+    ).values_list("kind", "value"))
+    return counts
+
+
+def sum_counts(kind, object_ids):
+    total = Counter.objects.filter(
+        kind=kind, object_id__in=object_ids
+    ).aggregate(total=Sum("value"))["total"]
+    return total or 0
+
+
+def delete_counters(kinds, object_id):
+    Counter.objects.filter(kind__in=kinds, object_id=object_id).delete()
+
+
+def collect_counters(post_model, comment_model, follow_model, counter_model):
+    """Считает все счётчики заново по таблицам (для rebuild)."""
+    counters = [counter_model(
+        kind=TOTAL_POSTS, object_id=0, value=post_model.objects.count()
+    )]
+    sources = (
+        (AUTHOR_POSTS, post_model.objects, "author"),
+        (GROUP_POSTS, post_model.objects.filter(group__isnull=False),
+         "group"),
+        (POST_COMMENTS, comment_model.objects, "post"),
+        (FOLLOWERS, follow_model.objects, "author"),
+        (FOLLOWING, follow_model.objects, "user"),
+    )
+    for kind, queryset, field in sources:
+        rows = queryset.order_by().values(field).annotate(total=Count("id"))
+        counters.extend(
+            counter_model(kind=kind, object_id=row[field], value=row["total"])
+            for row in rows.iterator()
+        )
+    return counters
+
+
+@transaction.atomic
+def rebuild():
+    Counter.objects.all().delete()
+    Counter.objects.bulk_create(
+        collect_counters(Post, Comment, Follow, Counter), batch_size=500
+    )
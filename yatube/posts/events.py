@@ -0,0 +1,127 @@
+"""Публикация событий лент для потоков Server-Sent Events.
+
+Брокер живёт в памяти процесса: post_create и add_comment после
+коммита публикуют событие в каналы лент (имена как у поколений в
+posts.caching), а потоки posts.streams этого же процесса его получают.
+Подписка — очередь с ограниченным размером: медленный читатель теряет
+события, а не память процесса.
+"""
+import json
+import queue
+import threading
+
+from django.conf import settings
+from django.db import transaction
+
+from .caching import GLOBAL_FEED, author_feed, group_feed, post_feed
+
+QUEUE_SIZE: int = 100
+POSTS_EVENT: str = "posts"
+COMMENT_EVENT: str = "comment"
+
+
+class TooManyStreams(Exception):
+    pass
+
+
+class Subscription:
+    def __init__(self, broker, channels):
+        self.broker = broker
+        self.channels = channels
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self.closed = False
+
+    def put(self, event, data):
+        try:
+            self.queue.put_nowait((event, data))
+        except queue.Full:
+            pass
+
+    def get(self, timeout):
+        """Следующее событие или None, если за timeout ничего не было."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    def __init__(self):
+        self.channels = {}
+        self.active = 0
+        self.lock = threading.Lock()
+
+    @property
+    def max_streams(self):
+        """Сверх лимита потоки не открываются. По умолчанию — половина
+        обработчиков процесса, чтобы обычным запросам всегда оставались
+        свободные."""
+        default = max(getattr(settings, "WSGI_THREADS", 1) // 2, 1)
+        return getattr(settings, "POSTS_EVENTS_MAX_STREAMS", default)
+
+    def is_full(self):
+        return self.active >= self.max_streams
+
+    def subscribe(self, channels):
+        with self.lock:
+            if self.is_full():
+                raise TooManyStreams
+            subscription = Subscription(self, set(channels))
+            for channel in subscription.channels:
+                self.channels.setdefault(channel, set()).add(subscription)
+            self.active += 1
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            if subscription.closed:
+                return
+            subscription.closed = True
+            for channel in subscription.channels:
+                subscribers = self.channels.get(channel, set())
+                subscribers.discard(subscription)
+                if not subscribers:
+                    self.channels.pop(channel, None)
+            self.active -= 1
+
+    def publish(self, channels, event, data):
+        """Кладёт событие каждому подписчику хотя бы одного из каналов."""
+        with self.lock:
+            subscribers = set()
+            for channel in channels:
+                subscribers |= self.channels.get(channel, set())
+        for subscription in subscribers:
+            subscription.put(event, data)
+
+
+broker = Broker()
+
+
+def format_event(event, data):
+    payload = json.dumps(data, ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+def publish_post(post):
+    """Новый пост: событие для общей ленты, ленты автора и группы."""
+    channels = [GLOBAL_FEED, author_feed(post.author.username)]
+    if post.group_id:
+        channels.append(group_feed(post.group.slug))
+    transaction.on_commit(
+        lambda: broker.publish(channels, POSTS_EVENT, {"id": post.pk})
+    )
+
+
+def publish_comment(comment):
+    data = {
+        "id": comment.pk,
+        "author": comment.author.username,
+        "text": comment.text,
+        "pub_date": comment.pub_date.isoformat(),
+    }
+    transaction.on_commit(lambda: broker.publish(
+        [post_feed(comment.post_id)], COMMENT_EVENT, data
+    ))
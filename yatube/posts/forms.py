@@ -1,4 +1,6 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
+from .images import process, validate
 from .models import Post, Comment
 from django.utils.translation import gettext_lazy as _
 
@@ -27,6 +29,19 @@ class PostForm(forms.ModelForm):
             'group': _('Также у постов могут быть группы')
         }
 
+    def clean_image(self):
+        """Новую загрузку уменьшает и перекодирует, см. posts.images."""
+        image = self.cleaned_data.get("image")
+        if not isinstance(image, UploadedFile):
+            if not image:
+                self.instance.image_width = self.instance.image_height = None
+            return image
+        validate(image)
+        image, width, height = process(image)
+        self.instance.image_width = width
+        self.instance.image_height = height
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
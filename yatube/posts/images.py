@@ -0,0 +1,85 @@
+"""Обработка картинки поста при загрузке.
+
+Оригинал не хранится: размер проверяется по заголовку файла, без
+декодирования пикселей, затем картинка уменьшается до MAX_SIDE по
+большей стороне, поворачивается по EXIF и сохраняется в самом
+экономном формате, который умеет эта сборка Pillow, без метаданных.
+sorl потом режет миниатюры уже из небольшого файла.
+"""
+import os
+from io import BytesIO
+
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+MAX_UPLOAD_SIZE: int = 20 * 2 ** 20
+# Больше пикселей не декодируем вовсе: защита от «бомб» вроде PNG
+# 50000x50000, которые весят килобайты.
+MAX_PIXELS: int = 50_000_000
+MAX_SIDE: int = 2048
+QUALITY: int = 82
+# Форматы в порядке предпочтения; берётся первый, который Pillow умеет
+# записывать. Без них — JPEG, а для картинок с прозрачностью PNG.
+PREFERRED_FORMATS = ("AVIF", "WEBP")
+EXTENSIONS = {"AVIF": ".avif", "WEBP": ".webp", "JPEG": ".jpg", "PNG": ".png"}
+
+
+def output_format(has_alpha):
+    Image.init()
+    for name in PREFERRED_FORMATS:
+        if name in Image.SAVE:
+            return name
+    return "PNG" if has_alpha else "JPEG"
+
+
+def read_size(file_):
+    """Ширина и высота по заголовку файла, пиксели не декодируются."""
+    file_.seek(0)
+    with Image.open(file_) as image:
+        return image.size
+
+
+def validate(upload):
+    if upload.size > MAX_UPLOAD_SIZE:
+        raise ValidationError(
+            "Файл больше %(limit)d МБ",
+            params={"limit": MAX_UPLOAD_SIZE // 2 ** 20},
+            code="file_too_large",
+        )
+    width, height = read_size(upload)
+    if width * height > MAX_PIXELS:
+        raise ValidationError(
+            "Слишком большое разрешение: %(width)dx%(height)d",
+            params={"width": width, "height": height},
+            code="too_many_pixels",
+        )
+
+
+def process(upload):
+    """Уменьшенная и перекодированная копия загрузки.
+
+    Возвращает (ContentFile, ширина, высота) для сохранения в
+    Post.image. Загрузку предварительно проверяет validate().
+    """
+    upload.seek(0)
+    with Image.open(upload) as image:
+        # JPEG декодируется сразу с уменьшением в 2-8 раз, если
+        # оригинал намного больше MAX_SIDE.
+        image.draft("RGB", (MAX_SIDE, MAX_SIDE))
+        image = ImageOps.exif_transpose(image)
+        has_alpha = image.mode in ("RGBA", "LA", "PA") or (
+            image.mode == "P" and "transparency" in image.info
+        )
+        image = image.convert("RGBA" if has_alpha else "RGB")
+        image.thumbnail((MAX_SIDE, MAX_SIDE), Image.LANCZOS, reducing_gap=3)
+        file_format = output_format(has_alpha)
+        buffer = BytesIO()
+        # exif и icc_profile не передаются — метаданные не сохраняются.
+        image.save(buffer, file_format, quality=QUALITY, optimize=True)
+        width, height = image.size
+    name = os.path.splitext(os.path.basename(upload.name))[0]
+    content = ContentFile(
+        buffer.getvalue(), name=name + EXTENSIONS[file_format]
+    )
+    return content, width, height
@@ -0,0 +1,48 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+
+from posts.paginators import ElidedPaginator
+from posts.views import PER_PAGE
+
+from .benchmark_views import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет рендер навигации по страницам результатов поиска при "
+        "растущем числе страниц и печатает p50/p99 и размер HTML в JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=200)
+        parser.add_argument(
+            "--pages", type=int, nargs="+",
+            default=[10, 1000, 100000, 10000000],
+        )
+
+    def handle(self, *args, **options):
+        results = []
+        for pages in options["pages"]:
+            # range вместо запроса: COUNT и срез стоят O(1).
+            paginator = ElidedPaginator(range(pages * PER_PAGE), PER_PAGE)
+            page_obj = paginator.get_page(pages // 2 or 1)
+            context = {"page_obj": page_obj, "search_query": "пост"}
+            timings = []
+            for _ in range(options["repeat"]):
+                started = time.perf_counter()
+                html = render_to_string(
+                    "posts/includes/paginator.html", context
+                )
+                timings.append(time.perf_counter() - started)
+            results.append({
+                "pages": pages,
+                "p50_ms": round(percentile(timings, 50) * 1000, 3),
+                "p99_ms": round(percentile(timings, 99) * 1000, 3),
+                "bytes": len(html.encode()),
+            })
+        self.stdout.write(json.dumps(
+            {"repeat": options["repeat"], "results": results}, indent=2
+        ))
@@ -0,0 +1,199 @@
+import json
+import math
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import urls
+from posts.models import Comment, Follow, Post, User
+
+# Ленты, которые смотрят и гости, и пользователи.
+PUBLIC_VIEWS = (
+    "index", "group_list", "profile", "post_detail", "post_comments",
+    "api_index", "api_group_list", "api_profile",
+)
+
+
+def percentile(values, percent):
+    """Процентиль по ближайшему рангу."""
+    values = sorted(values)
+    rank = math.ceil(percent / 100 * len(values))
+    return values[max(rank, 1) - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Прогоняет все адреса приложения posts через тестовый клиент и "
+        "печатает p50/p99 времени ответа и число SQL-запросов в JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--output", help="файл для результатов вместо stdout",
+        )
+        parser.add_argument(
+            "--baseline",
+            help="JSON прошлого прогона: упасть, если стало хуже",
+        )
+        parser.add_argument(
+            "--threshold", type=float, default=1.5,
+            help="во сколько раз может вырасти p50 относительно baseline",
+        )
+
+    def handle(self, *args, **options):
+        reader, post, comment = self.sample_objects()
+        scenarios = self.scenarios(reader, post, comment)
+        names = [pattern.name for pattern in urls.urlpatterns]
+        missing = set(names) - set(scenarios)
+        if missing:
+            raise CommandError(
+                f"Нет сценария замера для: {', '.join(sorted(missing))}"
+            )
+
+        guest = Client()
+        user = Client()
+        user.force_login(reader)
+        results = []
+        hosts = [*settings.ALLOWED_HOSTS, "testserver"]
+        with override_settings(ALLOWED_HOSTS=hosts):
+            for name in names:
+                method, kwargs, data = scenarios[name]
+                url = reverse(f"{urls.app_name}:{name}", kwargs=kwargs)
+                clients = {"user": user}
+                if name in PUBLIC_VIEWS:
+                    clients = {"guest": guest, "user": user}
+                for client_name, client in clients.items():
+                    results.append(self.measure(
+                        f"{urls.app_name}:{name}", client_name,
+                        getattr(client, method), url, data,
+                        options["repeat"],
+                    ))
+
+        report = json.dumps(
+            {"repeat": options["repeat"], "results": results},
+            ensure_ascii=False, indent=2,
+        )
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                output.write(report)
+        else:
+            self.stdout.write(report)
+        if options["baseline"]:
+            self.compare(results, options["baseline"], options["threshold"])
+
+    def sample_objects(self):
+        follow = Follow.objects.select_related("user").first()
+        reader = follow.user if follow else User.objects.first()
+        if reader is None:
+            raise CommandError("База пуста, сначала запустите seed_data")
+        post = (
+            reader.posts.filter(group__isnull=False).first()
+            or Post.objects.filter(group__isnull=False).first()
+            or Post.objects.first()
+        )
+        if post is None:
+            raise CommandError("Нет постов, сначала запустите seed_data")
+        comment = (
+            reader.comments.first() or Comment.objects.first()
+        )
+        return reader, post, comment
+
+    def scenarios(self, reader, post, comment):
+        """Метод, аргументы адреса и данные формы для каждого имени."""
+        author = post.author.username
+        return {
+            "index": ("get", {}, None),
+            "group_list": (
+                "get", {"slug": post.group.slug if post.group else "-"},
+                None,
+            ),
+            "profile": ("get", {"username": author}, None),
+            "post_detail": ("get", {"post_id": post.pk}, None),
+            "post_create": ("post", {}, {"text": "Замер создания поста"}),
+            "post_edit": (
+                "post", {"post_id": post.pk}, {"text": "Замер правки поста"},
+            ),
+            "post_delete": ("get", {"post_id": post.pk}, None),
+            "comment_delete": (
+                "get", {"comment_id": comment.pk if comment else 0}, None,
+            ),
+            "add_comment": (
+                "post", {"post_id": post.pk}, {"text": "Замер комментария"},
+            ),
+            "post_comments": ("get", {"post_id": post.pk}, None),
+            "follow_index": ("get", {}, None),
+            "profile_follow": ("get", {"username": author}, None),
+            "profile_unfollow": ("get", {"username": author}, None),
+            "export": ("get", {"kind": "posts"}, None),
+            "api_index": ("get", {}, None),
+            "api_group_list": (
+                "get", {"slug": post.group.slug if post.group else "-"},
+                None,
+            ),
+            "api_profile": ("get", {"username": author}, None),
+            # Потоки событий: замеряется подключение, тело не читается;
+            # без POSTS_LIVE_UPDATES — ответ 404.
+            "events_index": ("get", {}, None),
+            "events_group": (
+                "get", {"slug": post.group.slug if post.group else "-"},
+                None,
+            ),
+            "events_profile": ("get", {"username": author}, None),
+            "events_follow": ("get", {}, None),
+            "events_post": ("get", {"post_id": post.pk}, None),
+        }
+
+    def measure(self, view, client_name, request, url, data, repeat):
+        timings = []
+        queries = []
+        for _ in range(repeat):
+            # Пишущие адреса откатываются, чтобы каждый прогон видел
+            # одни и те же данные.
+            with transaction.atomic():
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = request(url, data)
+                    timings.append(time.perf_counter() - started)
+                queries.append(len(captured.captured_queries))
+                transaction.set_rollback(True)
+        return {
+            "view": view,
+            "client": client_name,
+            "status": response.status_code,
+            "p50_ms": round(percentile(timings, 50) * 1000, 3),
+            "p99_ms": round(percentile(timings, 99) * 1000, 3),
+            "queries": percentile(queries, 50),
+            "queries_max": max(queries),
+        }
+
+    def compare(self, results, path, threshold):
+        with open(path) as baseline_file:
+            baseline = {
+                (row["view"], row["client"]): row
+                for row in json.load(baseline_file)["results"]
+            }
+        regressions = []
+        for row in results:
+            old = baseline.get((row["view"], row["client"]))
+            if old is None:
+                continue
+            if row["queries"] > old["queries"]:
+                regressions.append(
+                    f"{row['view']} ({row['client']}): SQL-запросов "
+                    f"{old['queries']} -> {row['queries']}"
+                )
+            if row["p50_ms"] > old["p50_ms"] * threshold:
+                regressions.append(
+                    f"{row['view']} ({row['client']}): p50 "
+                    f"{old['p50_ms']} -> {row['p50_ms']} ms"
+                )
+        if regressions:
+            raise CommandError(
+                "Хуже, чем в baseline:\n" + "\n".join(regressions)
+            )
@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import counters, timeline
+from posts.models import Counter, Follow, Post
+from posts.paginators import CursorPaginator, encode_cursor
+from posts.views import PER_PAGE
+
+
+class Command(BaseCommand):
+    help = "Печатает план выполнения (EXPLAIN) запросов, которые делают ленты."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--post", type=int,
+            help="id поста, по которому берутся автор, группа и курсор",
+        )
+        parser.add_argument(
+            "--reader", help="username читателя для ленты подписок",
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.filter(group__isnull=False)
+        if options["post"]:
+            posts = Post.objects.filter(pk=options["post"])
+        post = posts.select_related("author", "group").first()
+        if post is None:
+            raise CommandError("Нет постов с группой для примера запросов")
+        follows = Follow.objects.select_related("user")
+        if options["reader"]:
+            follows = follows.filter(user__username=options["reader"])
+        follow = follows.first()
+        for name, queryset in self.view_queries(post, follow):
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(queryset.explain())
+            self.stdout.write("")
+
+    def view_queries(self, post, follow):
+        cursor = encode_cursor("n", post.pub_date, post.pk)
+        feeds = {
+            "index": Post.objects.feed(),
+            "group_posts": post.group.posts.feed(),
+            "profile": post.author.posts.feed(),
+        }
+        if follow is not None:
+            feed, date_field = timeline.follow_feed(follow.user)
+            feeds["follow_index"] = (feed, date_field)
+        for name, feed in feeds.items():
+            date_field = "pub_date"
+            if isinstance(feed, tuple):
+                feed, date_field = feed
+            paginator = CursorPaginator(feed, PER_PAGE, date_field=date_field)
+            yield f"{name}: первая страница", paginator.page_queryset(None)[0]
+            yield f"{name}: страница по курсору", paginator.page_queryset(
+                cursor
+            )[0]
+        yield "profile: подписка", Follow.objects.filter(
+            user=post.author, author=post.author
+        )[:1]
+        yield "post_detail: пост", Post.objects.detail().with_counts().filter(
+            pk=post.pk
+        )
+        yield "post_detail: комментарии", post.comments.feed()
+        yield "счётчик", Counter.objects.filter(
+            kind=counters.AUTHOR_POSTS, object_id=post.author_id
+        )
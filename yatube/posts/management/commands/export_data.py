@@ -0,0 +1,75 @@
+import gzip
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import (CHUNK_SIZE, EXPORTS, FORMATS, export_lines,
+                          gzip_complete_size, gzip_stream, last_exported_id)
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгружает посты, комментарии или подписки в JSON Lines или CSV "
+        "потоком, не загружая таблицу в память."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=EXPORTS)
+        parser.add_argument("--format", choices=FORMATS, default="jsonl")
+        parser.add_argument("--gzip", action="store_true")
+        parser.add_argument("--output", help="файл вместо stdout")
+        parser.add_argument(
+            "--after", type=int, default=0,
+            help="выгружать строки с id больше этого",
+        )
+        parser.add_argument(
+            "--resume", action="store_true",
+            help="дописать --output, начиная после его последней строки",
+        )
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        path = options["output"]
+        file_format = options["format"]
+        after = options["after"]
+        if (options["gzip"] or options["resume"]) and not path:
+            raise CommandError("--gzip и --resume работают только с --output")
+        if options["resume"] and os.path.exists(path):
+            after = max(after, self.last_id(path, file_format, options))
+        lines = export_lines(
+            options["kind"], file_format, after, header=not after,
+            chunk_size=options["chunk_size"],
+        )
+        if not path:
+            for line in lines:
+                self.stdout.write(line, ending="")
+            return
+        # Продолжение дописывается в конец: для gzip это новый member,
+        # и файл читается как один поток.
+        mode = "a" if after else "w"
+        if options["gzip"]:
+            with open(path, mode + "b") as output:
+                for chunk in gzip_stream(lines):
+                    output.write(chunk)
+        else:
+            with open(path, mode, newline="", encoding="utf-8") as output:
+                output.writelines(lines)
+        self.stderr.write(self.style.SUCCESS(
+            f"Выгрузка {options['kind']} после id {after} записана в {path}"
+        ))
+
+    def last_id(self, path, file_format, options):
+        """id последней целой записи --output; оборванный хвост прошлой
+        выгрузки отрезается, чтобы продолжение легло сразу за ней."""
+        if options["gzip"]:
+            with open(path, "rb") as existing:
+                size = gzip_complete_size(existing)
+            os.truncate(path, size)
+            with gzip.open(
+                path, "rt", newline="", encoding="utf-8"
+            ) as existing:
+                return last_exported_id(existing, file_format)[0]
+        with open(path, newline="", encoding="utf-8") as existing:
+            last_id, size = last_exported_id(existing, file_format)
+        os.truncate(path, size)
+        return last_id
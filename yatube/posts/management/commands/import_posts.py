@@ -0,0 +1,267 @@
+import csv
+import json
+import os
+import sys
+from collections import Counter as Deltas
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts import caching, counters, images, thumbnails, timeline
+from posts.models import Follow, Group, Post, User
+from posts.search import get_backend
+
+
+class Lookup:
+    """Кэш id по уникальному полю: неизвестные ключи пачки — одним
+    запросом, отсутствующие в базе при create — одним bulk_create."""
+
+    def __init__(self, model, field, build=None):
+        self.model = model
+        self.field = field
+        self.build = build
+        self.ids = {}
+
+    def resolve(self, keys):
+        missing = {key for key in keys if key not in self.ids}
+        if missing:
+            self.ids.update(self.fetch(missing))
+        missing -= self.ids.keys()
+        if missing and self.build is not None:
+            self.model.objects.bulk_create(
+                [self.build(key) for key in missing], ignore_conflicts=True
+            )
+            self.ids.update(self.fetch(missing))
+
+    def fetch(self, keys):
+        return self.model.objects.filter(
+            **{f"{self.field}__in": keys}
+        ).values_list(self.field, "id")
+
+    def get(self, key):
+        return self.ids.get(key)
+
+
+class Command(BaseCommand):
+    help = (
+        "Загружает посты из JSON Lines или CSV (поля text, author, group, "
+        "pub_date, image) пачками через bulk_create."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="файл с постами или - для stdin")
+        parser.add_argument(
+            "--format", choices=("jsonl", "csv"),
+            help="по умолчанию определяется по расширению",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--images-dir", default=".",
+            help="откуда брать картинки из поля image",
+        )
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument(
+            "--create-missing", action="store_true",
+            help="создавать неизвестных авторов и группы",
+        )
+
+    def handle(self, *args, **options):
+        self.images_dir = options["images_dir"]
+        self.authors = Lookup(User, "username")
+        self.groups = Lookup(Group, "slug")
+        if options["create_missing"]:
+            password = make_password(None)
+            self.authors.build = lambda username: User(
+                username=username, password=password
+            )
+            self.groups.build = lambda slug: Group(
+                slug=slug, title=slug, description=""
+            )
+        self.deltas = Deltas()
+        self.skipped = 0
+        last_id = Post.objects.aggregate(last=Max("id"))["last"] or 0
+
+        rows = enumerate(self.read(options["path"], options["format"]), 1)
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            self.pool = pool
+            while True:
+                batch = list(islice(rows, options["batch_size"]))
+                if not batch:
+                    break
+                self.import_batch(batch)
+
+        imported = Post.objects.filter(pk__gt=last_id)
+        self.update_derived(imported)
+        self.stdout.write(self.style.SUCCESS(
+            f"Загружено постов: {imported.count()}, "
+            f"пропущено строк: {self.skipped}"
+        ))
+
+    def read(self, path, file_format):
+        if file_format is None:
+            file_format = "csv" if path.endswith(".csv") else "jsonl"
+        if path == "-":
+            source = sys.stdin
+        else:
+            try:
+                source = open(path, newline="", encoding="utf-8")
+            except OSError as error:
+                raise CommandError(error)
+        with source:
+            if file_format == "csv":
+                yield from csv.DictReader(source)
+                return
+            for line in source:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError as error:
+                        # Ошибку разбора строки отчитывает validate.
+                        yield error
+
+    def import_batch(self, batch):
+        # Ключи авторов и групп собираются только со строк правильного
+        # вида: одна кривая строка не должна ронять всю пачку.
+        valid = [
+            (number, row) for number, row in batch
+            if not self.skip(number, self.validate(row))
+        ]
+        self.authors.resolve({row["author"] for _, row in valid})
+        self.groups.resolve(
+            {row["group"] for _, row in valid if row.get("group")}
+        )
+        rows = [
+            row for number, row in valid
+            if not self.skip(number, self.unknown_reference(row))
+        ]
+        copied = self.pool.map(self.copy_image, rows)
+        posts = [
+            Post(
+                text=row["text"],
+                author_id=self.authors.get(row["author"]),
+                group_id=self.groups.get(row.get("group")),
+                pub_date=self.pub_date(row),
+                image=image,
+                image_width=width,
+                image_height=height,
+            )
+            for row, (image, width, height) in zip(rows, copied)
+        ]
+        for post in posts:
+            post.render_text()
+        # bulk_create проставляет pub_date сам (auto_now_add): даты из
+        # выгрузки возвращаются следом одним bulk_update.
+        pub_dates = [post.pub_date for post in posts]
+        with transaction.atomic():
+            last_id = Post.objects.aggregate(last=Max("id"))["last"] or 0
+            Post.objects.bulk_create(posts)
+            self.fill_ids(posts, last_id)
+            for post, pub_date in zip(posts, pub_dates):
+                post.pub_date = pub_date
+            Post.objects.bulk_update(posts, ["pub_date"])
+            for post in posts:
+                thumbnails.enqueue(post.image.name, post.pk)
+        for post in posts:
+            self.deltas[counters.TOTAL_POSTS, 0] += 1
+            self.deltas[counters.AUTHOR_POSTS, post.author_id] += 1
+            if post.group_id:
+                self.deltas[counters.GROUP_POSTS, post.group_id] += 1
+        self.stdout.write(f"Обработано строк: {batch[-1][0]}")
+
+    def fill_ids(self, posts, last_id):
+        """SQLite не возвращает id из bulk_create: внутри транзакции
+        пачки её строки — следующие после last_id по порядку."""
+        if not posts or posts[0].pk is not None:
+            return
+        ids = Post.objects.filter(pk__gt=last_id).order_by(
+            "pk"
+        ).values_list("pk", flat=True)
+        for post, pk in zip(posts, ids):
+            post.pk = pk
+
+    def skip(self, number, error):
+        if error:
+            self.skipped += 1
+            self.stderr.write(f"Строка {number}: {error}")
+        return bool(error)
+
+    def validate(self, row):
+        """Ошибка вида строки или None; ссылки проверяет
+        unknown_reference, когда ключи пачки уже найдены."""
+        if isinstance(row, ValueError):
+            return f"не разобран JSON: {row}"
+        if not isinstance(row, dict):
+            return "строка не объект JSON"
+        for field in ("text", "author", "group", "pub_date", "image"):
+            if row.get(field) and not isinstance(row[field], str):
+                return f"поле {field} не строка"
+        if not row.get("text"):
+            return "нет текста"
+        if not row.get("author"):
+            return "нет автора"
+        if row.get("pub_date") and parse_datetime(row["pub_date"]) is None:
+            return f"не разобрана дата {row['pub_date']!r}"
+        return None
+
+    def unknown_reference(self, row):
+        if self.authors.get(row["author"]) is None:
+            return f"неизвестный автор {row['author']!r}"
+        if row.get("group") and self.groups.get(row["group"]) is None:
+            return f"неизвестная группа {row['group']!r}"
+        return None
+
+    def pub_date(self, row):
+        if not row.get("pub_date"):
+            return timezone.now()
+        pub_date = parse_datetime(row["pub_date"])
+        if timezone.is_naive(pub_date):
+            pub_date = timezone.make_aware(pub_date)
+        return pub_date
+
+    def copy_image(self, row):
+        """Уменьшает картинку, как при загрузке через форму, и кладёт в
+        хранилище поля image (в потоке пула). Возвращает имя и размеры."""
+        if not row.get("image"):
+            return "", None, None
+        field = Post._meta.get_field("image")
+        source = os.path.join(self.images_dir, row["image"])
+        try:
+            with open(source, "rb") as image:
+                upload = File(image)
+                images.validate(upload)
+                content, width, height = images.process(upload)
+            name = field.generate_filename(None, content.name)
+            return field.storage.save(name, content), width, height
+        except (OSError, ValidationError) as error:
+            self.stderr.write(f"Картинка не скопирована: {error}")
+            return "", None, None
+
+    def update_derived(self, imported):
+        """Счётчики, поиск и ленты — разом за всю загрузку."""
+        for (kind, object_id), delta in self.deltas.items():
+            counters.increment(kind, object_id, delta)
+        rows = imported.order_by().values_list("id", "text").iterator()
+        backend = get_backend()
+        while True:
+            batch = list(islice(rows, 2000))
+            if not batch:
+                break
+            backend.index_many(batch)
+        author_ids = {
+            object_id for kind, object_id in self.deltas
+            if kind == counters.AUTHOR_POSTS
+        }
+        follows = Follow.objects.filter(
+            author_id__in=author_ids
+        ).values_list("user_id", "author_id")
+        for user_id, author_id in follows.iterator():
+            timeline.backfill(user_id, author_id)
+        caching.bump_generation(caching.SITE_FEED)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+from posts.models import Counter
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает счётчики постов, комментариев и подписок."
+
+    def handle(self, *args, **options):
+        counters.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Счётчиков пересчитано: {Counter.objects.count()}"
+        ))
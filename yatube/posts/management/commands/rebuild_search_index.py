@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import caching
+from posts.models import Post
+from posts.search import get_backend
+
+
+class Command(BaseCommand):
+    help = "Перестраивает полнотекстовый индекс постов."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        rows = Post.objects.order_by().values_list("id", "text").iterator(
+            chunk_size=options["chunk_size"]
+        )
+        with transaction.atomic():
+            get_backend().rebuild(rows)
+        # Результаты поиска на главной закэшированы вместе с лентой.
+        caching.bump_generation(caching.GLOBAL_FEED)
+        self.stdout.write(self.style.SUCCESS("Поисковый индекс перестроен"))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from posts import caching, rendering
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает HTML и начало текста постов, сохранённых в обход "
+        "save() или до смены правил разметки."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int, default=rendering.CHUNK_SIZE
+        )
+
+    def handle(self, *args, **options):
+        read = updated = 0
+        for rows, changed in rendering.rerender(Post, options["chunk_size"]):
+            read += rows
+            updated += changed
+            self.stdout.write(f"Прочитано: {read}, обновлено: {updated}")
+        if updated:
+            caching.bump_generation(caching.SITE_FEED)
+        self.stdout.write(self.style.SUCCESS(
+            f"Перерисовано постов: {updated}"
+        ))
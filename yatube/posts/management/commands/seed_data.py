@@ -0,0 +1,139 @@
+import random
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from faker import Faker
+from mixer.backend.django import mixer
+
+from posts import caching, counters, timeline
+from posts.models import Comment, Follow, Group, Post, User
+
+PASSWORD: str = "benchmark"
+
+
+class Command(BaseCommand):
+    help = (
+        "Наполняет базу тестовыми пользователями, группами, постами, "
+        "комментариями и подписками для нагрузочных замеров."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--groups", type=int, default=20)
+        parser.add_argument("--posts", type=int, default=10000)
+        parser.add_argument("--comments", type=int, default=20000)
+        parser.add_argument("--follows", type=int, default=20000)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.batch_size = options["batch_size"]
+        self.random = random.Random(options["seed"])
+        Faker.seed(options["seed"])
+        self.fake = Faker("ru_RU")
+
+        self.create_groups(options["groups"])
+        self.create(User, self.users(options["users"]), options["users"])
+        user_ids = list(User.objects.values_list("id", flat=True))
+        group_ids = list(Group.objects.values_list("id", flat=True))
+        self.create(
+            Post, self.posts(options["posts"], user_ids, group_ids),
+            options["posts"],
+        )
+        post_ids = list(Post.objects.values_list("id", flat=True))
+        self.create(
+            Comment, self.comments(options["comments"], user_ids, post_ids),
+            options["comments"],
+        )
+        self.create(
+            Follow, self.follows(options["follows"], user_ids),
+            options["follows"],
+        )
+
+        # bulk_create не шлёт сигналы: всё производное строим разом.
+        self.stdout.write("Счётчики, ленты подписок и поисковый индекс...")
+        counters.rebuild()
+        timeline.rebuild()
+        call_command("rebuild_search_index", stdout=self.stdout)
+        caching.bump_generation(caching.SITE_FEED)
+        self.stdout.write(self.style.SUCCESS(
+            f"Пользователей: {User.objects.count()}, "
+            f"постов: {Post.objects.count()}, "
+            f"комментариев: {Comment.objects.count()}, "
+            f"подписок: {Follow.objects.count()}"
+        ))
+
+    def create(self, model, objects, total):
+        created = 0
+        while True:
+            batch = list(islice(objects, self.batch_size))
+            if not batch:
+                break
+            with transaction.atomic():
+                model.objects.bulk_create(batch, ignore_conflicts=True)
+            created += len(batch)
+            self.stdout.write(
+                f"{model._meta.verbose_name_plural}: {created}/{total}"
+            )
+
+    def pick(self, ids, skew=1):
+        """Случайный id; при skew > 1 первые id выпадают заметно чаще —
+        так появляются популярные авторы и обсуждаемые посты."""
+        return ids[int(len(ids) * self.random.random() ** skew)]
+
+    def create_groups(self, total):
+        start = Group.objects.count()
+        mixer.cycle(total).blend(
+            Group,
+            title=(self.fake.catch_phrase() for _ in range(total)),
+            slug=(f"bench-{start + i}" for i in range(total)),
+            description=(self.fake.paragraph() for _ in range(total)),
+        )
+
+    def users(self, total):
+        start = User.objects.count()
+        password = make_password(PASSWORD)
+        for i in range(total):
+            yield User(
+                username=f"bench_{start + i}",
+                first_name=self.fake.first_name(),
+                last_name=self.fake.last_name(),
+                email=f"bench_{start + i}@example.com",
+                password=password,
+            )
+
+    def posts(self, total, user_ids, group_ids):
+        for _ in range(total):
+            group_id = None
+            if group_ids and self.random.random() < 0.5:
+                group_id = self.random.choice(group_ids)
+            post = Post(
+                text=self.fake.paragraph(nb_sentences=5),
+                author_id=self.pick(user_ids, skew=2),
+                group_id=group_id,
+            )
+            post.render_text()
+            yield post
+
+    def comments(self, total, user_ids, post_ids):
+        if not post_ids:
+            return
+        for _ in range(total):
+            yield Comment(
+                text=self.fake.sentence(),
+                author_id=self.random.choice(user_ids),
+                post_id=self.pick(post_ids, skew=3),
+            )
+
+    def follows(self, total, user_ids):
+        if len(user_ids) < 2:
+            return
+        for _ in range(total):
+            user_id = self.random.choice(user_ids)
+            author_id = self.pick(user_ids, skew=3)
+            if user_id != author_id:
+                # Повторы отбрасывает ignore_conflicts.
+                yield Follow(user_id=user_id, author_id=author_id)
@@ -0,0 +1,61 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:08
+
+from django.db import migrations, models
+from django.db.models import Count
+
+# Копия posts.counters на момент миграции: код приложения потом меняется,
+# а миграция должна делать то же, что и при создании.
+TOTAL_POSTS = 'posts'
+AUTHOR_POSTS = 'author_posts'
+GROUP_POSTS = 'group_posts'
+POST_COMMENTS = 'post_comments'
+FOLLOWERS = 'followers'
+FOLLOWING = 'following'
+
+
+def fill_counters(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    Follow = apps.get_model('posts', 'Follow')
+    Counter = apps.get_model('posts', 'Counter')
+    counters = [Counter(
+        kind=TOTAL_POSTS, object_id=0, value=Post.objects.count()
+    )]
+    sources = (
+        (AUTHOR_POSTS, Post.objects, 'author'),
+        (GROUP_POSTS, Post.objects.filter(group__isnull=False), 'group'),
+        (POST_COMMENTS, Comment.objects, 'post'),
+        (FOLLOWERS, Follow.objects, 'author'),
+        (FOLLOWING, Follow.objects, 'user'),
+    )
+    for kind, queryset, field in sources:
+        rows = queryset.order_by().values(field).annotate(total=Count('id'))
+        counters.extend(
+            Counter(kind=kind, object_id=row[field], value=row['total'])
+            for row in rows.iterator()
+        )
+    Counter.objects.bulk_create(counters, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_follow'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=32)),
+                ('object_id', models.PositiveIntegerField(default=0)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='counter',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_counter'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:09
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Копия posts.timeline на момент миграции.
+BATCH_SIZE = 500
+
+
+def fill_timelines(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    TimelineEntry = apps.get_model('posts', 'TimelineEntry')
+    follows = apps.get_model('posts', 'Follow').objects.values_list(
+        'user_id', 'author_id'
+    )
+    for user_id, author_id in follows.iterator():
+        posts = Post.objects.filter(author_id=author_id).order_by(
+            'pk'
+        ).values_list('id', 'pub_date')
+        last_id = 0
+        while True:
+            batch = list(posts.filter(pk__gt=last_id)[:BATCH_SIZE])
+            if not batch:
+                break
+            last_id = batch[-1][0]
+            TimelineEntry.objects.bulk_create(
+                [
+                    TimelineEntry(
+                        user_id=user_id, post_id=post_id,
+                        author_id=author_id, pub_date=pub_date,
+                    )
+                    for post_id, pub_date in batch
+                ],
+                ignore_conflicts=True,
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0010_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField()),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='posts.Post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', '-pub_date'], name='timeline_user_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='timelineentry',
+            constraint=models.UniqueConstraint(fields=('user', 'post'), name='unique_timeline_entry'),
+        ),
+        migrations.RunPython(fill_timelines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:14
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+FOLLOWERS = 'followers'
+FOLLOWING = 'following'
+
+
+def drop_duplicate_follows(apps, schema_editor):
+    # Ограничение раньше не применялось, дубли надо убрать до его
+    # создания, а счётчики подписок (0010 считал и дубли) — пересчитать.
+    Follow = apps.get_model('posts', 'Follow')
+    Counter = apps.get_model('posts', 'Counter')
+    duplicates = Follow.objects.values('user', 'author').annotate(
+        keep_id=Min('id'), total=Count('id')
+    ).filter(total__gt=1)
+    dropped = False
+    for row in duplicates.iterator():
+        Follow.objects.filter(
+            user=row['user'], author=row['author']
+        ).exclude(id=row['keep_id']).delete()
+        dropped = True
+    if not dropped:
+        return
+    Counter.objects.filter(kind__in=[FOLLOWERS, FOLLOWING]).delete()
+    counters = []
+    for kind, field in ((FOLLOWERS, 'author'), (FOLLOWING, 'user')):
+        rows = Follow.objects.order_by().values(field).annotate(
+            total=Count('id')
+        )
+        counters.extend(
+            Counter(kind=kind, object_id=row[field], value=row['total'])
+            for row in rows.iterator()
+        )
+    Counter.objects.bulk_create(counters, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_post_updated'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_follows, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'pub_date', 'id'], name='comment_post_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-pub_date', '-id'], name='post_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-pub_date', '-id'], name='post_author_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-pub_date', '-id'], name='post_group_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_follow'),
+        ),
+    ]
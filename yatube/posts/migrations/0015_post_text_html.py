@@ -0,0 +1,60 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:36
+
+from django.db import migrations, models
+from django.utils import timezone
+from django.utils.html import linebreaks, urlize
+from django.utils.text import Truncator
+
+# Копия posts.rendering на момент миграции.
+EXCERPT_LENGTH = 30
+CHUNK_SIZE = 500
+
+
+def render_posts(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    last_id = 0
+    while True:
+        rows = list(
+            Post.objects.filter(pk__gt=last_id).order_by('pk').values_list(
+                'pk', 'text'
+            )[:CHUNK_SIZE]
+        )
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        now = timezone.now()
+        Post.objects.bulk_update(
+            [
+                Post(
+                    pk=pk,
+                    text_html=linebreaks(
+                        urlize(text, nofollow=True, autoescape=True)
+                    ),
+                    excerpt=Truncator(text).chars(EXCERPT_LENGTH),
+                    updated=now,
+                )
+                for pk, text in rows
+            ],
+            ['text_html', 'excerpt', 'updated'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(default='', editable=False, max_length=30),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.RunPython(render_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:39
+
+from django.db import migrations, models
+from PIL import Image
+
+
+def read_size(file_):
+    """Копия posts.images.read_size: размер по заголовку файла."""
+    file_.seek(0)
+    with Image.open(file_) as image:
+        return image.size
+
+
+def fill_image_sizes(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    posts = Post.objects.exclude(image='').order_by('pk')
+    last_id = 0
+    while True:
+        batch = list(posts.filter(pk__gt=last_id).only('image', 'image_width', 'image_height')[:500])
+        if not batch:
+            return
+        last_id = batch[-1].pk
+        for post in batch:
+            try:
+                with post.image.open('rb') as image:
+                    post.image_width, post.image_height = read_size(image)
+            except (OSError, SyntaxError):
+                pass
+        Post.objects.bulk_update(batch, ['image_width', 'image_height'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_post_text_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_image_sizes, migrations.RunPython.noop),
+    ]
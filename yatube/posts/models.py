@@ -1,7 +1,10 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from core.models import CreatedModel
-from django.db.models import UniqueConstraint
+from django.db.models import OuterRef, Subquery, UniqueConstraint
+from django.db.models.functions import Coalesce
+
+from . import rendering
 
 User = get_user_model()
 PER_W = 15
@@ -16,6 +19,32 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def feed(self):
+        """Посты для лент: автор и группа приходят тем же запросом."""
+        return self.select_related("author", "group")
+
+    def detail(self):
+        return self.select_related("author", "group")
+
+    def with_counts(self):
+        """Добавляет comment_count из таблицы счётчиков."""
+        from .counters import POST_COMMENTS
+
+        comments = Counter.objects.filter(
+            kind=POST_COMMENTS, object_id=OuterRef("pk")
+        ).values("value")[:1]
+        return self.annotate(comment_count=Coalesce(Subquery(comments), 0))
+
+
+class CommentQuerySet(models.QuerySet):
+    def feed(self):
+        return self.select_related("author").order_by("pub_date", "id")
+
+    def detail(self):
+        return self.select_related("author", "post")
+
+
 class Post(CreatedModel):
     text = models.TextField()
     author = models.ForeignKey(
@@ -30,13 +59,56 @@ class Post(CreatedModel):
         upload_to='posts/',
         blank=True
     )
+    # Размеры картинки для <img width height>. Не width_field: тот
+    # открывал бы файл при создании каждого объекта без размеров.
+    image_width = models.PositiveIntegerField(
+        null=True, blank=True, editable=False
+    )
+    image_height = models.PositiveIntegerField(
+        null=True, blank=True, editable=False
+    )
+    # Версия карточки поста в кэше фрагментов, см. posts.caching.
+    updated = models.DateTimeField(auto_now=True)
+    # Производные от text, считаются в save(), см. posts.rendering.
+    text_html = models.TextField(editable=False, default="")
+    excerpt = models.CharField(
+        max_length=rendering.EXCERPT_LENGTH, editable=False, default=""
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ["-pub_date"]
+        indexes = [
+            models.Index(
+                fields=["-pub_date", "-id"], name="post_date_idx"
+            ),
+            models.Index(
+                fields=["author", "-pub_date", "-id"],
+                name="post_author_date_idx",
+            ),
+            models.Index(
+                fields=["group", "-pub_date", "-id"],
+                name="post_group_date_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.text[:PER_W]
 
+    def save(self, *args, **kwargs):
+        self.render_text()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "text" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "text_html", "excerpt"}
+        super().save(*args, **kwargs)
+
+    def render_text(self):
+        """Заполняет text_html и excerpt по text; bulk_create обходит
+        save(), поэтому там его зовут явно."""
+        self.text_html = rendering.render_html(self.text)
+        self.excerpt = rendering.render_excerpt(self.text)
+
 
 class Comment(CreatedModel):
     text = models.TextField()
@@ -51,6 +123,16 @@ class Comment(CreatedModel):
         related_name="comments"
     )
 
+    objects = CommentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["post", "pub_date", "id"],
+                name="comment_post_date_idx",
+            ),
+        ]
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -63,4 +145,65 @@ class Follow(models.Model):
         on_delete=models.CASCADE,
         related_name="following"
     )
-    UniqueConstraint(fields=['user', 'author'], name='unique_follow')
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(fields=['user', 'author'], name='unique_follow'),
+        ]
+
+
+class Counter(models.Model):
+    """Счётчик, который поддерживают сигналы вместо COUNT по таблицам.
+
+    kind описывает, что считаем (см. posts.counters), object_id — чей
+    это счётчик; для общих счётчиков object_id равен нулю.
+    """
+    kind = models.CharField(max_length=32)
+    object_id = models.PositiveIntegerField(default=0)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=['kind', 'object_id'], name='unique_counter'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.kind}:{self.object_id}={self.value}'
+
+
+class TimelineEntry(models.Model):
+    """Пост в ленте подписок читателя, разложенный при публикации.
+
+    pub_date копирует дату поста, чтобы страница ленты читалась одним
+    диапазоном по индексу (user, pub_date).
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="timeline"
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="timeline_entries"
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+"
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=['user', 'post'], name='unique_timeline_entry'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date'], name='timeline_user_date_idx'
+            ),
+        ]
@@ -0,0 +1,185 @@
+import base64
+import binascii
+
+from django.core.paginator import Page, Paginator
+from django.utils.functional import cached_property
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+CURSOR_PARAM: str = "cursor"
+
+
+def encode_cursor(direction, pub_date, pk):
+    """Непрозрачный токен: направление + ключ (pub_date, id)."""
+    raw = f"{direction}|{pub_date.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Возвращает (direction, pub_date, pk) или None для битого токена."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        direction, pub_date, pk = raw.decode().split("|")
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if direction not in ("n", "p") or pub_date is None:
+        return None
+    return direction, pub_date, pk
+
+
+def ascending_page(queryset, cursor, per_page, date_field="pub_date"):
+    """Keyset-страница от старых к новым: строки после ключа из курсора
+    и курсор следующей страницы (None, если строк больше нет)."""
+    rows = queryset.order_by(date_field, "id")
+    decoded = decode_cursor(cursor)
+    if decoded is not None:
+        _, pub_date, pk = decoded
+        rows = rows.filter(**{f"{date_field}__gte": pub_date}).filter(
+            Q(**{f"{date_field}__gt": pub_date}) | Q(id__gt=pk)
+        )
+    rows = list(rows[:per_page + 1])
+    if len(rows) <= per_page:
+        return rows, None
+    rows = rows[:per_page]
+    last = rows[-1]
+    return rows, encode_cursor("n", getattr(last, date_field), last.pk)
+
+
+class CursorPaginator(Paginator):
+    """Keyset-пагинация по (pub_date, id) от новых к старым.
+
+    Вместо COUNT(*) и OFFSET запрашивает per_page + 1 строк после (или
+    до) ключа из курсора, поэтому любая страница стоит как первая.
+    number и num_pages описывают только наличие соседних страниц, чтобы
+    has_next()/has_previous() у обычного Page продолжали работать.
+    date_field позволяет сортировать по аннотации с копией pub_date,
+    например по дате записи в материализованной ленте.
+    """
+
+    def __init__(self, object_list, per_page, date_field="pub_date",
+                 **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.date_field = date_field
+
+    def page_queryset(self, cursor):
+        """Запрос одной страницы (per_page + 1 строк) и его направление."""
+        decoded = decode_cursor(cursor)
+        field = self.date_field
+        posts = self.object_list.order_by(f"-{field}", "-id")
+        backwards = False
+        if decoded is not None:
+            direction, pub_date, pk = decoded
+            backwards = direction == "p"
+            # Условие на дату вынесено отдельно от OR, чтобы база
+            # начала чтение индекса прямо с ключа курсора.
+            if backwards:
+                posts = posts.filter(**{f"{field}__gte": pub_date}).filter(
+                    Q(**{f"{field}__gt": pub_date}) | Q(id__gt=pk)
+                ).reverse()
+            else:
+                posts = posts.filter(**{f"{field}__lte": pub_date}).filter(
+                    Q(**{f"{field}__lt": pub_date}) | Q(id__lt=pk)
+                )
+        return posts[:self.per_page + 1], decoded is not None, backwards
+
+    def get_page(self, cursor):
+        field = self.date_field
+        posts, has_cursor, backwards = self.page_queryset(cursor)
+        rows = list(posts)
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards and not has_more:
+            # Дошли до начала ленты: отдаём полную первую страницу.
+            return self.get_page(None)
+        if backwards:
+            rows.reverse()
+            has_next = has_previous = True
+        else:
+            has_next, has_previous = has_more, has_cursor
+        number = 2 if has_previous else 1
+        self.num_pages = number + 1 if has_next else number
+        page = Page(rows, number, self)
+        page.next_cursor = None
+        page.previous_cursor = None
+        if rows and has_next:
+            last = rows[-1]
+            page.next_cursor = encode_cursor(
+                "n", getattr(last, field), last.pk
+            )
+        if rows and has_previous:
+            first = rows[0]
+            page.previous_cursor = encode_cursor(
+                "p", getattr(first, field), first.pk
+            )
+        return page
+
+    def page(self, cursor):
+        return self.get_page(cursor)
+
+
+class ElidedPaginator(Paginator):
+    """Нумерованные страницы с навигацией постоянного размера.
+
+    Вместо page_range на все страницы страница получает elided_range:
+    первые и последние on_ends номеров, по on_each_side соседей текущей
+    и ELLIPSIS на месте пропусков — не больше 2 * (on_each_side +
+    on_ends) + 3 пунктов при любом числе страниц.
+    """
+    ELLIPSIS = "…"
+
+    def __init__(self, object_list, per_page, on_each_side=2, on_ends=1,
+                 **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.on_each_side = on_each_side
+        self.on_ends = on_ends
+
+    def get_elided_page_range(self, number=1):
+        number = self.validate_number(number)
+        on_each_side, on_ends = self.on_each_side, self.on_ends
+        if self.num_pages <= (on_each_side + on_ends) * 2:
+            return list(self.page_range)
+        pages = []
+        if number > on_each_side + on_ends + 2:
+            pages.extend(range(1, on_ends + 1))
+            pages.append(self.ELLIPSIS)
+            pages.extend(range(number - on_each_side, number + 1))
+        else:
+            pages.extend(range(1, number + 1))
+        if number < self.num_pages - on_each_side - on_ends - 1:
+            pages.extend(range(number + 1, number + on_each_side + 1))
+            pages.append(self.ELLIPSIS)
+            pages.extend(range(self.num_pages - on_ends + 1,
+                               self.num_pages + 1))
+        else:
+            pages.extend(range(number + 1, self.num_pages + 1))
+        return pages
+
+    def get_page(self, number):
+        page = super().get_page(number)
+        page.elided_range = self.get_elided_page_range(page.number)
+        return page
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator для changelist админки на больших таблицах.
+
+    Без фильтров и поиска вместо COUNT(*) по всей таблице берёт оценку
+    estimate() (счётчик, статистику базы); с условиями WHERE считает
+    честно — там строк обычно немного.
+    """
+
+    def __init__(self, object_list, per_page, estimate=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.estimate = estimate
+
+    @cached_property
+    def count(self):
+        if self.estimate is not None and not self.object_list.query.where:
+            estimate = self.estimate()
+            if estimate is not None:
+                return estimate
+        return super().count
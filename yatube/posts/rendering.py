@@ -0,0 +1,55 @@
+"""Текст поста, заранее превращённый в HTML.
+
+Абзацы, переносы строк и ссылки считаются один раз при сохранении
+поста (Post.save), а не фильтрами linebreaks и urlize при каждом
+показе. Строки, сохранённые в обход save (bulk_create, старые данные),
+дорисовывает rerender — пачками по первичному ключу.
+"""
+from django.utils import timezone
+from django.utils.html import linebreaks, urlize
+from django.utils.text import Truncator
+
+EXCERPT_LENGTH: int = 30
+CHUNK_SIZE: int = 500
+
+
+def render_html(text):
+    """HTML текста: экранирование, ссылки и абзацы."""
+    return linebreaks(urlize(text, nofollow=True, autoescape=True))
+
+
+def render_excerpt(text):
+    """Начало текста для заголовка страницы, как truncatechars."""
+    return Truncator(text).chars(EXCERPT_LENGTH)
+
+
+def rerender(model, chunk_size=CHUNK_SIZE):
+    """Пересчитывает text_html и excerpt там, где они разошлись с text.
+
+    Читает по chunk_size строк за раз (keyset по pk) и после каждой
+    пачки отдаёт пару (прочитано, обновлено). Обновлённым постам
+    сдвигается updated, чтобы устарели их карточки в кэше.
+    """
+    last_id = 0
+    while True:
+        rows = list(
+            model.objects.filter(pk__gt=last_id).order_by("pk").values_list(
+                "pk", "text", "text_html", "excerpt"
+            )[:chunk_size]
+        )
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        now = timezone.now()
+        changed = []
+        for pk, text, old_html, old_excerpt in rows:
+            text_html = render_html(text)
+            excerpt = render_excerpt(text)
+            if (text_html, excerpt) != (old_html, old_excerpt):
+                changed.append(model(
+                    pk=pk, text_html=text_html, excerpt=excerpt, updated=now
+                ))
+        model.objects.bulk_update(
+            changed, ["text_html", "excerpt", "updated"]
+        )
+        yield len(rows), len(changed)
@@ -0,0 +1,194 @@
+import math
+import re
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+DEFAULT_BACKEND: str = "posts.search.SQLiteFTSBackend"
+SEARCH_LIMIT: int = 1000
+FTS_TABLE: str = "posts_post_fts"
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+class SearchBackend:
+    """Инвертированный индекс по Post.text.
+
+    search() возвращает id постов по убыванию релевантности; каждое
+    слово запроса ищется как префикс, все слова обязательны.
+    """
+
+    def index(self, post_id, text):
+        raise NotImplementedError
+
+    def remove(self, post_id):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        raise NotImplementedError
+
+    def count(self, query):
+        """Сколько постов находит запрос, без ограничения limit."""
+        raise NotImplementedError
+
+    def index_many(self, rows):
+        """Индексирует пачку пар (id, text)."""
+        for post_id, text in rows:
+            self.index(post_id, text)
+
+    def rebuild(self, rows):
+        """Переиндексирует всё по итератору пар (id, text)."""
+        self.clear()
+        self.index_many(rows)
+
+
+class SQLiteFTSBackend(SearchBackend):
+    """Индекс в виртуальной таблице FTS5, ранжирование по bm25."""
+
+    def index(self, post_id, text):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [post_id]
+            )
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)",
+                [post_id, text],
+            )
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [post_id]
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+
+    def index_many(self, rows):
+        rows = list(rows)
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid = %s",
+                [(post_id,) for post_id, _ in rows],
+            )
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)",
+                rows,
+            )
+
+    def rebuild(self, rows):
+        self.clear()
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)",
+                rows,
+            )
+
+    @staticmethod
+    def match(query):
+        """Выражение MATCH: каждое слово как префикс, или None."""
+        tokens = tokenize(query)
+        if not tokens:
+            return None
+        return " ".join(f'"{token}"*' for token in tokens)
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        match = self.match(query)
+        if match is None:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+                f"ORDER BY rank, rowid DESC LIMIT %s",
+                [match, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def count(self, query):
+        match = self.match(query)
+        if match is None:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT count(*) FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s",
+                [match],
+            )
+            return cursor.fetchone()[0]
+
+
+class MemoryBackend(SearchBackend):
+    """Индекс в памяти процесса, для тестов и разработки без FTS5."""
+
+    def __init__(self):
+        self.postings = defaultdict(dict)
+        self.documents = {}
+
+    def index(self, post_id, text):
+        self.remove(post_id)
+        tokens = tokenize(text)
+        self.documents[post_id] = tokens
+        for token in tokens:
+            postings = self.postings[token]
+            postings[post_id] = postings.get(post_id, 0) + 1
+
+    def remove(self, post_id):
+        for token in set(self.documents.pop(post_id, ())):
+            postings = self.postings[token]
+            postings.pop(post_id, None)
+            if not postings:
+                del self.postings[token]
+
+    def clear(self):
+        self.postings.clear()
+        self.documents.clear()
+
+    def scores(self, query):
+        tokens = tokenize(query)
+        if not tokens:
+            return {}
+        total = len(self.documents)
+        scores = None
+        for token in tokens:
+            token_scores = defaultdict(float)
+            for term, postings in self.postings.items():
+                if not term.startswith(token):
+                    continue
+                idf = math.log(1 + total / len(postings))
+                for post_id, freq in postings.items():
+                    length = len(self.documents[post_id])
+                    token_scores[post_id] += freq / length * idf
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {
+                    post_id: score + token_scores[post_id]
+                    for post_id, score in scores.items()
+                    if post_id in token_scores
+                }
+        return scores
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        scores = self.scores(query)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        return [post_id for post_id, _ in ranked[:limit]]
+
+    def count(self, query):
+        return len(self.scores(query))
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    path = getattr(settings, "POSTS_SEARCH_BACKEND", DEFAULT_BACKEND)
+    return import_string(path)()
@@ -0,0 +1,198 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import caching, counters, timeline
+from .search import get_backend
+from .models import Comment, Follow, Group, Post, User
+
+# Поля группы, видные на страницах (название, ссылка, описание).
+GROUP_SHOWN_FIELDS = ("title", "slug", "description")
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_group(sender, instance, **kwargs):
+    """Запоминает группу до редактирования, чтобы перенести счётчики."""
+    instance._previous_group_id = None
+    if instance.pk is not None:
+        instance._previous_group_id = Post.objects.filter(
+            pk=instance.pk
+        ).values_list("group_id", flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, **kwargs):
+    if created:
+        counters.increment(counters.TOTAL_POSTS)
+        counters.increment(counters.AUTHOR_POSTS, instance.author_id)
+        if instance.group_id:
+            counters.increment(counters.GROUP_POSTS, instance.group_id)
+        timeline.fan_out(instance)
+        return
+    previous_group_id = getattr(instance, "_previous_group_id", None)
+    if previous_group_id != instance.group_id:
+        if previous_group_id:
+            counters.increment(counters.GROUP_POSTS, previous_group_id, -1)
+        if instance.group_id:
+            counters.increment(counters.GROUP_POSTS, instance.group_id)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.increment(counters.TOTAL_POSTS, delta=-1)
+    counters.increment(counters.AUTHOR_POSTS, instance.author_id, -1)
+    if instance.group_id:
+        counters.increment(counters.GROUP_POSTS, instance.group_id, -1)
+    counters.delete_counters([counters.POST_COMMENTS], instance.pk)
+
+
+def bump_post_feeds(post, *group_ids):
+    group_slugs = Group.objects.filter(
+        pk__in=[pk for pk in group_ids if pk]
+    ).values_list("slug", flat=True)
+    caching.bump_generation(
+        caching.GLOBAL_FEED,
+        caching.author_feed(post.author.username),
+        *map(caching.group_feed, group_slugs),
+    )
+
+
+@receiver(post_save, sender=Post)
+def bump_saved_post_feeds(sender, instance, **kwargs):
+    bump_post_feeds(
+        instance,
+        instance.group_id,
+        getattr(instance, "_previous_group_id", None),
+    )
+
+
+@receiver(post_delete, sender=Post)
+def bump_deleted_post_feeds(sender, instance, **kwargs):
+    bump_post_feeds(instance, instance.group_id)
+
+
+@receiver(post_save, sender=Post)
+def index_saved_post(sender, instance, **kwargs):
+    get_backend().index(instance.pk, instance.text)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_deleted_post(sender, instance, **kwargs):
+    get_backend().remove(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, **kwargs):
+    if created:
+        counters.increment(counters.POST_COMMENTS, instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    counters.increment(counters.POST_COMMENTS, instance.post_id, -1)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def bump_comment_post_feed(sender, instance, **kwargs):
+    caching.bump_generation(caching.post_feed(instance.post_id))
+
+
+@receiver(post_save, sender=Follow)
+def count_saved_follow(sender, instance, created, **kwargs):
+    if created:
+        counters.increment(counters.FOLLOWERS, instance.author_id)
+        counters.increment(counters.FOLLOWING, instance.user_id)
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    counters.increment(counters.FOLLOWERS, instance.author_id, -1)
+    counters.increment(counters.FOLLOWING, instance.user_id, -1)
+    timeline.prune(instance.user_id, instance.author_id)
+    timeline.demote(instance.author_id)
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_deleted_post_cards(sender, instance, **kwargs):
+    caching.invalidate_post_cards(instance)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def bump_followed_author_feed(sender, instance, **kwargs):
+    """Профиль автора показывает число подписчиков."""
+    caching.bump_generation(caching.author_feed(instance.author.username))
+
+
+def remember_shown_fields(instance, fields, update_fields):
+    """Запоминает поля, видные на страницах, до сохранения: после него
+    станет ясно, что из них поменялось."""
+    instance._shown_before = None
+    if instance.pk is None:
+        return
+    if update_fields is not None and not set(fields) & set(update_fields):
+        instance._shown_before = {}
+        return
+    instance._shown_before = type(instance).objects.filter(
+        pk=instance.pk
+    ).values(*fields).first()
+
+
+def changed_shown_fields(instance):
+    before = getattr(instance, "_shown_before", None)
+    if before is None:
+        return None
+    return {
+        field for field, value in before.items()
+        if getattr(instance, field) != value
+    }
+
+
+@receiver(pre_save, sender=Group)
+def remember_group_fields(sender, instance, update_fields, **kwargs):
+    remember_shown_fields(instance, GROUP_SHOWN_FIELDS, update_fields)
+
+
+@receiver(post_save, sender=Group)
+def refresh_group_post_cards(sender, instance, created, **kwargs):
+    """Правка группы, видная на страницах, сдвигает их кэш, а видная в
+    карточках — ещё и версию карточек её постов."""
+    changed = changed_shown_fields(instance)
+    if created or changed:
+        caching.bump_generation(caching.SITE_FEED)
+    if changed and changed & set(caching.GROUP_CARD_FIELDS):
+        caching.bump_generation(caching.group_cards(instance.pk))
+
+
+@receiver(pre_save, sender=User)
+def remember_author_fields(sender, instance, update_fields, **kwargs):
+    remember_shown_fields(
+        instance, caching.AUTHOR_CARD_FIELDS, update_fields
+    )
+
+
+@receiver(post_save, sender=User)
+def refresh_author_post_cards(sender, instance, created, **kwargs):
+    """Новая версия карточек после правки имени автора (не при входе и
+    не при смене пароля)."""
+    changed = changed_shown_fields(instance)
+    if created or not changed:
+        return
+    caching.bump_generation(
+        caching.SITE_FEED, caching.author_cards(instance.pk)
+    )
+
+
+@receiver(post_delete, sender=Group)
+def drop_group_counters(sender, instance, **kwargs):
+    counters.delete_counters([counters.GROUP_POSTS], instance.pk)
+    caching.bump_generation(caching.SITE_FEED)
+
+
+@receiver(post_delete, sender=User)
+def drop_user_counters(sender, instance, **kwargs):
+    counters.delete_counters(
+        [counters.AUTHOR_POSTS, counters.FOLLOWERS, counters.FOLLOWING],
+        instance.pk,
+    )
@@ -0,0 +1,118 @@
+"""Потоки Server-Sent Events с новыми постами и комментариями.
+
+Ленты получают событие posts с числом новых постов с момента
+подключения, страница поста — событие comment на каждый комментарий.
+Каждый поток держит один обработчик сервера, пока открыт: тысячи
+простаивающих потоков на процесс выдерживает только WSGI-сервер на
+гринлетах (gunicorn -k gevent), у потоковых воркеров их ограничивает
+число потоков. Поэтому потоки выключены, пока не задан
+POSTS_LIVE_UPDATES, а сверх POSTS_EVENTS_MAX_STREAMS отвечаем 503.
+"""
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.db import connection
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_GET
+
+from . import events
+from .caching import GLOBAL_FEED, author_feed, group_feed, post_feed
+from .models import Follow, Group, Post, User
+
+HEARTBEAT_SECONDS: int = 15
+# Поток закрывается сам, клиент переподключается через RETRY_MS: так
+# не копятся соединения, оборванные без ошибки записи.
+MAX_STREAM_SECONDS: int = 10 * 60
+RETRY_MS: int = 3000
+
+
+def live_updates_required(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not getattr(settings, "POSTS_LIVE_UPDATES", False):
+            raise Http404("Потоки событий выключены")
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def stream(channels):
+    """Тело ответа: подписка появляется при первом чтении и снимается,
+    когда сервер закрывает ответ."""
+    try:
+        subscription = events.broker.subscribe(channels)
+    except events.TooManyStreams:
+        yield f"retry: {RETRY_MS}\n\n"
+        return
+    deadline = time.monotonic() + MAX_STREAM_SECONDS
+    new_posts = 0
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        while time.monotonic() < deadline:
+            message = subscription.get(timeout=HEARTBEAT_SECONDS)
+            if message is None:
+                # Комментарий SSE: держит прокси и выявляет отключившихся.
+                yield ": heartbeat\n\n"
+                continue
+            event, data = message
+            if event == events.POSTS_EVENT:
+                new_posts += 1
+                data = {"count": new_posts}
+            yield events.format_event(event, data)
+    finally:
+        subscription.close()
+
+
+def event_stream(channels):
+    if events.broker.is_full():
+        response = HttpResponse(status=503)
+        response["Retry-After"] = RETRY_MS // 1000
+        return response
+    # Поток живёт долго, а база ему больше не нужна.
+    if not connection.in_atomic_block:
+        connection.close()
+    response = StreamingHttpResponse(
+        stream(channels), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@require_GET
+@live_updates_required
+def index(request):
+    return event_stream([GLOBAL_FEED])
+
+
+@require_GET
+@live_updates_required
+def group_posts(request, slug):
+    get_object_or_404(Group, slug=slug)
+    return event_stream([group_feed(slug)])
+
+
+@require_GET
+@live_updates_required
+def profile(request, username):
+    get_object_or_404(User, username=username)
+    return event_stream([author_feed(username)])
+
+
+@require_GET
+@live_updates_required
+@login_required
+def follow_index(request):
+    authors = Follow.objects.filter(user=request.user).values_list(
+        "author__username", flat=True
+    )
+    return event_stream([author_feed(username) for username in authors])
+
+
+@require_GET
+@live_updates_required
+def post_detail(request, post_id):
+    get_object_or_404(Post, pk=post_id)
+    return event_stream([post_feed(post_id)])
@@ -0,0 +1,17 @@
+from django.template import Library
+
+from posts import caching
+
+register = Library()
+
+
+@register.simple_tag(takes_context=True)
+def card_version(context, post):
+    """Версия карточки поста для ключа {% cache %}: версии всех постов
+    page_obj читаются при первой карточке страницы."""
+    versions = context.render_context.get("card_versions")
+    if versions is None or post.pk not in versions:
+        posts = [*context.get("page_obj", ()), post]
+        versions = caching.card_versions(posts)
+        context.render_context["card_versions"] = versions
+    return versions[post.pk]
@@ -0,0 +1,79 @@
+"""Тег {% thumbnail %} sorl, который не генерирует миниатюры при рендере.
+
+Готовая миниатюра берётся из kvstore sorl; если её ещё нет, генерация
+ставится в фоновый пул posts.thumbnails, а в шаблон отдаётся оригинал
+с размерами из Post.image_width и image_height.
+Синтаксис тот же, достаточно заменить {% load thumbnail %}.
+
+Если в контексте есть page_obj, первый тег страницы ищет миниатюры
+сразу для всех её объектов (то же поле, та же геометрия) одним
+обращением к kvstore; остальные теги цикла берут готовый ответ.
+"""
+from django.template import Library
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.templatetags.thumbnail import ThumbnailNode
+
+from posts import thumbnails
+
+register = Library()
+
+
+class PostThumbnailNode(ThumbnailNode):
+    def _render(self, context):
+        file_ = self.file_.resolve(context)
+        if not file_:
+            return self.nodelist_empty.render(context)
+        options = {}
+        for key, expr in self.options:
+            noresolve = {"True": True, "False": False, "None": None}
+            options[key] = noresolve.get(str(expr), expr.resolve(context))
+        geometry = self.geometry.resolve(context)
+        thumbnail = self.page_thumbnail(context, file_, geometry, options)
+        if thumbnail is None:
+            instance = getattr(file_, "instance", None)
+            thumbnails.enqueue(
+                getattr(file_, "name", file_), getattr(instance, "pk", None)
+            )
+            thumbnail = ImageFile(file_)
+            # Размер оригинала берём из поста: иначе im.width в шаблоне
+            # прочитал бы файл.
+            thumbnail.set_size((
+                getattr(instance, "image_width", None),
+                getattr(instance, "image_height", None),
+            ))
+        if not self.as_var:
+            return thumbnail.url
+        context.push()
+        context[self.as_var] = thumbnail
+        output = self.nodelist_file.render(context)
+        context.pop()
+        return output
+
+    def page_thumbnail(self, context, file_, geometry, options):
+        key = (self, geometry, frozenset(options.items()))
+        found = context.render_context.get(key)
+        if found is None:
+            found = thumbnails.cached_thumbnails(
+                [*self.page_files(context), file_], geometry, **options
+            )
+            context.render_context[key] = found
+        name = getattr(file_, "name", file_)
+        if name not in found:
+            found[name] = thumbnails.cached_thumbnail(
+                file_, geometry, **options
+            )
+        return found[name]
+
+    def page_files(self, context):
+        """Картинки всех объектов страницы: для post.image в цикле по
+        page_obj — image каждого поста."""
+        lookups = getattr(self.file_.var, "lookups", None)
+        page_obj = context.get("page_obj")
+        if page_obj is None or not lookups or len(lookups) < 2:
+            return []
+        return [getattr(obj, lookups[-1], None) for obj in page_obj]
+
+
+@register.tag
+def thumbnail(parser, token):
+    return PostThumbnailNode(parser, token)
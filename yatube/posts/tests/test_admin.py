@@ -0,0 +1,68 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+# Запросов на страницу changelist, сколько бы строк ни было в таблице:
+# сессия и её пользователь, оценка числа строк и сама страница; у постов
+# ещё date_hierarchy.
+CHANGELIST_QUERIES = {
+    "admin:posts_post_changelist": 6,
+    "admin:posts_comment_changelist": 4,
+    "admin:posts_follow_changelist": 4,
+}
+
+
+class AdminChangelistQueryTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            "admin_bench", "admin_bench@example.com", "password"
+        )
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def add_rows(self, count):
+        start = User.objects.count()
+        for number in range(start, start + count):
+            user = User.objects.create(username=f"admin_author_{number}")
+            group = Group.objects.create(
+                title=f"Группа {number}", slug=f"admin-group-{number}",
+                description="Описание",
+            )
+            post = Post.objects.create(
+                text=f"Пост {number}", author=user, group=group
+            )
+            Comment.objects.create(text="Комментарий", post=post, author=user)
+            Follow.objects.create(user=user, author=self.admin)
+
+    def changelist_queries(self, name):
+        self.client.get(reverse(name))
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse(name))
+        self.assertEqual(response.status_code, 200)
+        return len(captured.captured_queries)
+
+    def test_changelist_queries_bounded(self):
+        """Число запросов changelist не растёт с числом строк."""
+        self.add_rows(2)
+        few = {name: self.changelist_queries(name)
+               for name in CHANGELIST_QUERIES}
+        self.add_rows(30)
+        for name, budget in CHANGELIST_QUERIES.items():
+            with self.subTest(changelist=name):
+                queries = self.changelist_queries(name)
+                self.assertEqual(queries, few[name])
+                self.assertLessEqual(queries, budget)
+
+    def test_estimated_count_shown_without_filters(self):
+        self.add_rows(3)
+        response = self.client.get(reverse("admin:posts_post_changelist"))
+        self.assertEqual(response.context["cl"].result_count, 3)
+        response = self.client.get(
+            reverse("admin:posts_post_changelist"), {"q": "Пост 1"}
+        )
+        self.assertEqual(response.context["cl"].result_count, 1)
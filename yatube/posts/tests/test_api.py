@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Follow, Group, Post
+from posts.views import PER_PAGE
+
+User = get_user_model()
+
+
+@override_settings(POSTS_FEED_CACHE=True)
+class FeedApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username="api_author")
+        self.reader = User.objects.create(username="api_reader")
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.group = Group.objects.create(
+            title="Группа", slug="api-group", description="Описание"
+        )
+        self.posts = [
+            Post.objects.create(
+                text=f"Пост {i}", author=self.author, group=self.group
+            )
+            for i in range(PER_PAGE + 2)
+        ]
+        self.client = Client()
+
+    def test_feeds(self):
+        """Ленты отдают те же посты по курсору, что и HTML-страницы."""
+        urls = (
+            reverse("posts:api_index"),
+            reverse("posts:api_group_list", kwargs={"slug": "api-group"}),
+            reverse("posts:api_profile", kwargs={"username": "api_author"}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                data = self.client.get(url).json()
+                self.assertEqual(data["count"], PER_PAGE + 2)
+                self.assertEqual(len(data["results"]), PER_PAGE)
+                self.assertEqual(
+                    data["results"][0]["id"], self.posts[-1].pk
+                )
+                self.assertEqual(data["results"][0]["author"], "api_author")
+                data = self.client.get(
+                    url, {"cursor": data["next_cursor"]}
+                ).json()
+                self.assertEqual(
+                    [post["id"] for post in data["results"]],
+                    [self.posts[1].pk, self.posts[0].pk],
+                )
+        data = self.client.get(urls[2]).json()
+        self.assertEqual(data["author"]["followers"], 1)
+
+    def test_not_modified(self):
+        """Неизменившаяся лента отвечает 304 по ETag и Last-Modified,
+        новый пост меняет ETag."""
+        url = reverse("posts:api_group_list", kwargs={"slug": "api-group"})
+        response = self.client.get(url)
+        etag = response["ETag"]
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+        self.assertEqual(
+            self.client.get(
+                url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+            ).status_code,
+            304,
+        )
+        self.posts[0].text = "Исправленный пост"
+        self.posts[0].save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        other = reverse("posts:api_profile", kwargs={"username": "api_reader"})
+        etag = self.client.get(other)["ETag"]
+        self.assertEqual(
+            self.client.get(other, HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
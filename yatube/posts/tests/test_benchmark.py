@@ -0,0 +1,61 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from posts import counters, urls
+from posts.models import Comment, Follow, Post, TimelineEntry
+
+
+class BenchmarkTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        call_command(
+            "seed_data", users=5, groups=2, posts=30, comments=20,
+            follows=10, batch_size=7, stdout=StringIO(),
+        )
+
+    def benchmark(self, **options):
+        out = StringIO()
+        call_command("benchmark_views", repeat=2, stdout=out, **options)
+        return json.loads(out.getvalue())
+
+    def test_seed_data(self):
+        """Данные созданы вместе со счётчиками и лентами подписок."""
+        self.assertEqual(Post.objects.count(), 30)
+        self.assertEqual(Comment.objects.count(), 20)
+        self.assertEqual(
+            counters.get_count(counters.TOTAL_POSTS), Post.objects.count()
+        )
+        self.assertTrue(Follow.objects.exists())
+        self.assertTrue(TimelineEntry.objects.exists())
+
+    def test_benchmark_covers_every_url(self):
+        """В отчёте есть каждый адрес posts с временем и числом SQL."""
+        report = self.benchmark()
+        views = {row["view"] for row in report["results"]}
+        self.assertEqual(
+            views,
+            {f"posts:{pattern.name}" for pattern in urls.urlpatterns},
+        )
+        for row in report["results"]:
+            with self.subTest(view=row["view"], client=row["client"]):
+                self.assertLess(row["status"], 500)
+                self.assertLessEqual(row["p50_ms"], row["p99_ms"])
+        self.assertEqual(Post.objects.count(), 30)
+
+    def test_baseline_regression(self):
+        """Рост числа SQL-запросов относительно baseline — ошибка."""
+        report = self.benchmark()
+        for row in report["results"]:
+            row["queries"] = 0
+        fd, path = tempfile.mkstemp(suffix=".json")
+        self.addCleanup(os.remove, path)
+        with os.fdopen(fd, "w") as baseline:
+            json.dump(report, baseline)
+        with self.assertRaisesMessage(CommandError, "SQL-запросов"):
+            self.benchmark(baseline=path)
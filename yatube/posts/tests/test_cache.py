@@ -1,7 +1,11 @@
+from django.conf import settings
 from django.core.cache import cache
-from django.test import TestCase, Client
-from posts.models import Post, Group
+from django.test import TestCase, Client, override_settings
+from posts import caching
+from posts.checks import check_feed_cache
+from posts.models import Comment, Post, Group
 from django.urls import reverse
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -9,6 +13,7 @@ P_L = 10
 NUM_P = 13
 
 
+@override_settings(POSTS_FEED_CACHE=True)
 class TaskCacheTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -35,15 +40,210 @@ class TaskCacheTests(TestCase):
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
 
-    def test_cache_post(self):
-        """Проверка хранения в кэше"""
-        response = self.authorized_client.get(reverse('posts:index'))
-        res_1 = response.content
-        cache.set('my_cache', res_1, 20)
-        post_del = Post.objects.get(id=1)
-        post_del.delete()
-        response_2 = self.authorized_client.get(reverse('posts:index'))
-        res_2 = response_2.content
-        self.assertTrue(res_1 == res_2)
+    def get_index(self, client):
+        return client.get(reverse("posts:index")).content
+
+    def test_index_cached_for_guest(self):
+        """Главная для гостя берётся из кэша до смены поколения ленты."""
+        res_1 = self.get_index(self.guest_client)
+        Post.objects.filter(author=self.user).update(
+            text="Правка без сигнала",
+            text_html="<p>Правка без сигнала</p>",
+            updated=timezone.now(),
+        )
+        self.assertEqual(res_1, self.get_index(self.guest_client))
+        cache.clear()
+        self.assertNotEqual(res_1, self.get_index(self.guest_client))
+
+    def test_deleted_post_leaves_cache(self):
+        """Удаление поста сдвигает поколение, кэш не отдаёт старую страницу."""
+        post = Post.objects.create(
+            text="Пост для удаления", author=self.user
+        )
+        self.assertIn("Пост для удаления".encode(),
+                      self.get_index(self.guest_client))
+        post.delete()
+        self.assertNotIn("Пост для удаления".encode(),
+                         self.get_index(self.guest_client))
+
+    def test_authorized_user_not_cached(self):
+        """Авторизованным страница всегда рендерится заново."""
+        res_1 = self.get_index(self.authorized_client)
+        Post.objects.filter(author=self.user).update(
+            text="Правка без сигнала",
+            text_html="<p>Правка без сигнала</p>",
+            updated=timezone.now(),
+        )
+        self.assertNotEqual(res_1, self.get_index(self.authorized_client))
+
+    @override_settings(POSTS_FEED_CACHE=False)
+    def test_not_cached_without_shared_cache(self):
+        """Без общего кэша страницы не кэшируются: сдвиг поколения в
+        одном процессе другие не увидят."""
+        res_1 = self.get_index(self.guest_client)
+        Post.objects.filter(author=self.user).update(
+            text_html="<p>Правка без сигнала</p>", updated=timezone.now()
+        )
+        self.assertNotEqual(res_1, self.get_index(self.guest_client))
+
+    def test_feed_cache_needs_shared_cache(self):
+        self.assertEqual(
+            [error.id for error in check_feed_cache(None)], ["posts.E001"]
+        )
+        with override_settings(POSTS_FEED_CACHE=False):
+            self.assertEqual(check_feed_cache(None), [])
+
+    def test_search_and_unknown_params_not_cached(self):
+        """Поиск и лишние параметры не кладут страницы в кэш."""
+        for query in ("?search=пост", "?page=2", "?cursor=битый"):
+            with self.subTest(query=query):
+                res_1 = self.guest_client.get(
+                    reverse("posts:index") + query
+                ).content
+                Post.objects.filter(author=self.user).update(
+                    text_html=f"<p>Правка {query}</p>",
+                    updated=timezone.now(),
+                )
+                self.assertNotEqual(res_1, self.guest_client.get(
+                    reverse("posts:index") + query
+                ).content)
+
+    def test_generations_per_feed(self):
+        """Пост в другой группе не сбрасывает кэш чужой группы."""
+        other_group = Group.objects.create(
+            title="Другая группа", slug="group3", description="Описание"
+        )
+        group_feed = caching.group_feed(self.group.slug)
+        other_feed = caching.group_feed(other_group.slug)
+        before = caching.get_generations([group_feed, other_feed])
+        Post.objects.create(
+            text="Текст поста", author=self.user, group=other_group
+        )
+        after = caching.get_generations([group_feed, other_feed])
+        self.assertEqual(before[0], after[0])
+        self.assertEqual(before[1] + 1, after[1])
+
+
+class PostCardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="Alex2")
+        self.group = Group.objects.create(
+            title="Группа", slug="group2", description="Описание"
+        )
+        self.post = Post.objects.create(
+            text="Текст поста", author=self.user, group=self.group
+        )
+        self.guest_client = Client()
+
+    def get_index(self):
+        return self.guest_client.get(reverse("posts:index")).content.decode()
+
+    def test_card_is_cached_until_post_changes(self):
+        """Карточка берётся из кэша, пока пост не изменился."""
+        self.get_index()
+        Post.objects.filter(pk=self.post.pk).update(text="Тайная правка")
+        self.assertIn("Текст поста", self.get_index())
+        self.post.text = "Новый текст"
+        self.post.save()
+        self.assertIn("Новый текст", self.get_index())
+
+    def test_group_and_author_changes_refresh_cards(self):
+        """Правка группы или автора даёт новую версию карточек, не трогая
+        строки постов."""
+        updated = self.post.updated
+        self.get_index()
+        self.group.slug = "renamed"
+        self.group.save()
+        self.assertIn("/group/renamed/", self.get_index())
+        self.user.first_name = "Алекс"
+        self.user.last_name = "Иванов"
+        self.user.save()
+        self.assertIn("Алекс Иванов", self.get_index())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.updated, updated)
+
+    def test_hidden_changes_keep_caches(self):
+        """Правки, которых не видно на страницах, кэш не сбрасывают."""
+        generations = caching.get_generations([caching.SITE_FEED])
+        self.user.set_password("new-password")
+        self.user.save()
+        self.user.last_login = timezone.now()
+        self.user.save(update_fields=["last_login"])
+        self.group.save()
+        self.assertEqual(
+            caching.get_generations([caching.SITE_FEED]), generations
+        )
+
+
+@override_settings(POSTS_FEED_CACHE=True)
+class ConditionalGetTests(TestCase):
+    def setUp(self):
         cache.clear()
-        self.assertIsNone(cache.get('my_cache'))
+        self.user = User.objects.create(username="etag_author")
+        self.reader = User.objects.create(username="etag_reader")
+        self.group = Group.objects.create(
+            title="Группа", slug="etag-group", description="Описание"
+        )
+        self.post = Post.objects.create(
+            text="Пост", author=self.user, group=self.group
+        )
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def test_not_modified(self):
+        """Неизменившиеся страницы отвечают 304 по ETag."""
+        urls = (
+            reverse("posts:index"),
+            reverse("posts:group_list", kwargs={"slug": "etag-group"}),
+            reverse("posts:profile", kwargs={"username": "etag_author"}),
+            reverse("posts:post_detail", kwargs={"post_id": self.post.pk}),
+        )
+        for client in (self.guest_client, self.authorized_client):
+            for url in urls:
+                with self.subTest(url=url, client=client):
+                    # Первый ответ страницы с формой ставит CSRF-cookie.
+                    client.get(url)
+                    etag = client.get(url)["ETag"]
+                    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+                    self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes(self):
+        """ETag зависит от читателя, меняется с постом и комментариями."""
+        url = reverse("posts:post_detail", kwargs={"post_id": self.post.pk})
+        etag = self.guest_client.get(url)["ETag"]
+        self.assertNotEqual(self.authorized_client.get(url)["ETag"], etag)
+        Comment.objects.create(
+            text="Комментарий", post=self.post, author=self.reader
+        )
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.post.text = "Исправленный пост"
+        self.post.save()
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Исправленный пост")
+        missing = reverse("posts:post_detail", kwargs={"post_id": 10 ** 6})
+        self.assertEqual(self.guest_client.get(missing).status_code, 404)
+
+    @override_settings(POSTS_FEED_CACHE=False)
+    def test_no_validators_without_shared_cache(self):
+        """Без общего кэша поколения у каждого процесса свои: ни ETag,
+        ни Last-Modified — иначе 304 на изменённую ленту."""
+        for url in (reverse("posts:index"), reverse("posts:api_index")):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertNotIn("ETag", response)
+                self.assertNotIn("Last-Modified", response)
+
+    def test_etag_changes_with_csrf_token(self):
+        """Страница с формой не отвечает 304 после смены CSRF-токена:
+        иначе браузер отправил бы форму со старым токеном."""
+        url = reverse("posts:post_detail", kwargs={"post_id": self.post.pk})
+        self.authorized_client.get(url)
+        etag = self.authorized_client.get(url)["ETag"]
+        self.authorized_client.cookies[settings.CSRF_COOKIE_NAME] = "new"
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,88 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from posts import counters
+from posts.models import Comment, Counter, Follow, Group, Post
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="Alex")
+        self.reader = User.objects.create(username="Mike")
+        self.group = Group.objects.create(
+            title="Группа 1", slug="group1", description="Описание"
+        )
+        self.other_group = Group.objects.create(
+            title="Группа 2", slug="group2", description="Описание"
+        )
+        self.post = Post.objects.create(
+            text="Текст поста", author=self.user, group=self.group
+        )
+
+    def test_post_counters(self):
+        """Создание, перенос в другую группу и удаление поста."""
+        Post.objects.create(text="Второй пост", author=self.user)
+        self.assertEqual(counters.get_count(counters.TOTAL_POSTS), 2)
+        self.assertEqual(
+            counters.get_count(counters.AUTHOR_POSTS, self.user.pk), 2
+        )
+        self.assertEqual(
+            counters.get_count(counters.GROUP_POSTS, self.group.pk), 1
+        )
+        self.post.group = self.other_group
+        self.post.save()
+        self.assertEqual(
+            counters.get_count(counters.GROUP_POSTS, self.group.pk), 0
+        )
+        self.assertEqual(
+            counters.get_count(counters.GROUP_POSTS, self.other_group.pk), 1
+        )
+        self.post.delete()
+        self.assertEqual(counters.get_count(counters.TOTAL_POSTS), 1)
+        self.assertEqual(
+            counters.get_count(counters.GROUP_POSTS, self.other_group.pk), 0
+        )
+
+    def test_comment_and_follow_counters(self):
+        """Комментарии и подписки меняют свои счётчики."""
+        comment = Comment.objects.create(
+            text="Коммент", post=self.post, author=self.reader
+        )
+        self.assertEqual(
+            counters.get_count(counters.POST_COMMENTS, self.post.pk), 1
+        )
+        comment.delete()
+        self.assertEqual(
+            counters.get_count(counters.POST_COMMENTS, self.post.pk), 0
+        )
+        Follow.objects.create(user=self.reader, author=self.user)
+        self.assertEqual(
+            counters.get_object_counts(
+                (counters.FOLLOWERS, counters.FOLLOWING), self.user.pk
+            ),
+            {counters.FOLLOWERS: 1, counters.FOLLOWING: 0},
+        )
+        Follow.objects.filter(user=self.reader).delete()
+        self.assertEqual(
+            counters.get_count(counters.FOLLOWERS, self.user.pk), 0
+        )
+
+    def test_rebuild_command(self):
+        """rebuild_counters восстанавливает сбитые счётчики."""
+        Comment.objects.create(
+            text="Коммент", post=self.post, author=self.reader
+        )
+        Follow.objects.create(user=self.reader, author=self.user)
+        expected = set(Counter.objects.exclude(value=0).values_list(
+            "kind", "object_id", "value"
+        ))
+        Counter.objects.update(value=100)
+        call_command("rebuild_counters", stdout=StringIO())
+        self.assertEqual(
+            set(Counter.objects.values_list("kind", "object_id", "value")),
+            expected,
+        )
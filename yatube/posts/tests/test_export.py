@@ -0,0 +1,123 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.export import FORMATS
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create(username="exporter")
+        self.reader = User.objects.create(username="export_reader")
+        group = Group.objects.create(
+            title="Группа", slug="export-group", description="Описание"
+        )
+        self.posts = [
+            Post.objects.create(
+                text=f"Пост {i}", author=self.author, group=group
+            )
+            for i in range(3)
+        ]
+        Comment.objects.create(
+            text="Комментарий", post=self.posts[0], author=self.reader
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def export(self, kind, **options):
+        call_command("export_data", kind, stderr=StringIO(), **options)
+
+    def test_export_resume(self):
+        """Продолжение выгрузки дописывает только новые строки."""
+        path = os.path.join(self.directory, "posts.jsonl")
+        self.export("posts", output=path)
+        new_post = Post.objects.create(text="Новый", author=self.author)
+        self.export("posts", output=path, resume=True)
+        with open(path, encoding="utf-8") as exported:
+            rows = [json.loads(line) for line in exported]
+        self.assertEqual(
+            [row["id"] for row in rows],
+            [post.pk for post in self.posts] + [new_post.pk],
+        )
+        self.assertEqual(rows[0]["author"], "exporter")
+        self.assertEqual(rows[0]["group"], "export-group")
+
+    def test_export_gzip_csv(self):
+        """CSV в gzip читается целиком и после продолжения."""
+        path = os.path.join(self.directory, "follows.csv.gz")
+        self.export("follows", output=path, format="csv", gzip=True)
+        Follow.objects.create(user=self.author, author=self.reader)
+        self.export(
+            "follows", output=path, format="csv", gzip=True, resume=True
+        )
+        with gzip.open(path, "rt", encoding="utf-8") as exported:
+            lines = exported.read().splitlines()
+        self.assertEqual(lines[0], "id,user,author")
+        self.assertEqual(len(lines), 3)
+
+    def test_resume_after_interrupted_export(self):
+        """Оборванная запись отрезается, многострочный текст в CSV не
+        сбивает продолжение."""
+        self.posts[1].text = "Первая строка\n2,вторая строка"
+        self.posts[1].save()
+        for file_format in FORMATS:
+            with self.subTest(format=file_format):
+                path = os.path.join(self.directory, f"posts.{file_format}")
+                self.export("posts", output=path, format=file_format)
+                with open(path, "rb") as exported:
+                    complete = exported.read()
+                with open(path, "wb") as exported:
+                    exported.write(complete[:-5])
+                self.export(
+                    "posts", output=path, format=file_format, resume=True
+                )
+                with open(path, "rb") as exported:
+                    self.assertEqual(exported.read(), complete)
+
+    def test_resume_after_truncated_gzip(self):
+        path = os.path.join(self.directory, "posts.jsonl.gz")
+        self.export("posts", output=path, gzip=True)
+        Post.objects.create(text="Новый", author=self.author)
+        self.export("posts", output=path, gzip=True, resume=True)
+        with open(path, "rb") as exported:
+            complete = exported.read()
+        with open(path, "wb") as exported:
+            exported.write(complete[:-10])
+        self.export("posts", output=path, gzip=True, resume=True)
+        with gzip.open(path, "rt", encoding="utf-8") as exported:
+            rows = [json.loads(line) for line in exported]
+        self.assertEqual(len(rows), 4)
+
+    def test_export_view(self):
+        """Выгрузка по HTTP доступна только персоналу и идёт потоком."""
+        url = reverse("posts:export", kwargs={"kind": "comments"})
+        client = Client()
+        client.force_login(self.reader)
+        self.assertEqual(client.get(url).status_code, 302)
+        admin = User.objects.create(username="export_admin", is_staff=True)
+        client.force_login(admin)
+        response = client.get(url, {"after": 0})
+        self.assertTrue(response.streaming)
+        rows = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).splitlines()
+        ]
+        self.assertEqual(rows[0]["text"], "Комментарий")
+        response = client.get(url, {"format": "csv", "gzip": 1})
+        content = gzip.decompress(b"".join(response.streaming_content))
+        self.assertTrue(content.decode().startswith("id,post,author"))
+        response = client.get(
+            reverse("posts:export", kwargs={"kind": "users"})
+        )
+        self.assertEqual(response.status_code, 404)
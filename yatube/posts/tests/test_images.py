@@ -0,0 +1,70 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from posts import images
+from posts.models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_upload(size, file_format="JPEG", name="photo.jpg", **options):
+    buffer = BytesIO()
+    Image.new("RGB", size, "red").save(buffer, file_format, **options)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageUploadTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create(username="image_author")
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def create_post(self, upload):
+        return self.client.post(
+            reverse("posts:post_create"),
+            {"text": "Пост с картинкой", "image": upload},
+        )
+
+    def test_upload_downscaled_without_metadata(self):
+        """Картинка уменьшается до MAX_SIDE, EXIF не сохраняется."""
+        exif = Image.Exif()
+        exif[0x010F] = "Камера"
+        with mock.patch.object(images, "MAX_SIDE", 100):
+            self.create_post(make_upload((400, 200), exif=exif.tobytes()))
+        post = Post.objects.get(author=self.user)
+        self.assertEqual((post.image_width, post.image_height), (100, 50))
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(stored.size, (100, 50))
+            self.assertEqual(stored.format, images.output_format(False))
+            self.assertFalse(stored.getexif())
+
+    def test_too_many_pixels_rejected(self):
+        """Слишком большое разрешение отклоняется до декодирования."""
+        with mock.patch.object(images, "MAX_PIXELS", 100), \
+                mock.patch.object(images, "process") as process:
+            response = self.create_post(make_upload((20, 20)))
+        self.assertFalse(process.called)
+        self.assertFormError(
+            response, "form", "image", "Слишком большое разрешение: 20x20"
+        )
+        self.assertFalse(Post.objects.filter(author=self.user).exists())
+
+    def test_page_has_sized_img(self):
+        self.create_post(make_upload((40, 30)))
+        response = self.client.get(reverse("posts:index"))
+        self.assertContains(response, 'width="40" height="30"')
@@ -0,0 +1,117 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+from posts import counters
+from posts.models import Follow, Group, Post, TimelineEntry
+from posts.search import get_backend
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImportPostsTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.author = User.objects.create(username="importer")
+        self.reader = User.objects.create(username="import_reader")
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.group = Group.objects.create(
+            title="Группа", slug="import-group", description="Описание"
+        )
+        self.source_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.source_dir)
+        Image.new("RGB", (60, 40), "red").save(
+            os.path.join(self.source_dir, "photo.png")
+        )
+
+    def write(self, name, content):
+        path = os.path.join(self.source_dir, name)
+        with open(path, "w", encoding="utf-8") as source:
+            source.write(content)
+        return path
+
+    def import_posts(self, path, **options):
+        out, err = StringIO(), StringIO()
+        call_command(
+            "import_posts", path, images_dir=self.source_dir, batch_size=2,
+            stdout=out, stderr=err, **options
+        )
+        return err.getvalue()
+
+    def test_import_jsonl(self):
+        """Посты загружаются с датами и картинками, производные данные
+        обновляются после загрузки."""
+        rows = [
+            {"text": "Старый пост про ёжика", "author": "importer",
+             "group": "import-group", "pub_date": "2015-05-01T10:00:00",
+             "image": "photo.png"},
+            {"text": "Второй пост", "author": "importer"},
+            {"text": "Чужой пост", "author": "nobody"},
+        ]
+        path = self.write(
+            "posts.jsonl", "\n".join(json.dumps(row) for row in rows)
+        )
+        errors = self.import_posts(path)
+        self.assertIn("Строка 3", errors)
+        self.assertEqual(Post.objects.count(), 2)
+        post = Post.objects.get(text="Старый пост про ёжика")
+        self.assertEqual(post.pub_date.year, 2015)
+        self.assertEqual(post.group, self.group)
+        self.assertTrue(post.image.name.startswith("posts/photo"))
+        self.assertTrue(os.path.exists(post.image.path))
+        self.assertEqual(counters.get_count(counters.TOTAL_POSTS), 2)
+        self.assertEqual(
+            counters.get_count(counters.AUTHOR_POSTS, self.author.pk), 2
+        )
+        self.assertEqual(
+            counters.get_count(counters.GROUP_POSTS, self.group.pk), 1
+        )
+        self.assertEqual(get_backend().search("ёжика"), [post.pk])
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 2
+        )
+
+    def test_import_csv_create_missing(self):
+        """Из CSV с --create-missing создаются новые авторы и группы."""
+        path = self.write(
+            "posts.csv",
+            "text,author,group\nПост из CSV,newcomer,new-group\n",
+        )
+        self.import_posts(path, create_missing=True)
+        post = Post.objects.select_related("author", "group").get()
+        self.assertEqual(post.author.username, "newcomer")
+        self.assertEqual(post.group.slug, "new-group")
+        self.assertFalse(post.author.has_usable_password())
+
+    def test_malformed_lines_skipped(self):
+        """Битый JSON и строки не-объекты пропускаются и считаются."""
+        path = self.write("posts.jsonl", "\n".join([
+            '{"text": "Первый", "author": "importer"}',
+            '{"text": "Оборван',
+            '["text", "importer"]',
+            '{"text": "Автор списком", "author": ["importer"]}',
+            '{"text": "Последний", "author": "importer"}',
+        ]))
+        out, err = StringIO(), StringIO()
+        call_command("import_posts", path, stdout=out, stderr=err)
+        self.assertIn("пропущено строк: 3", out.getvalue())
+        self.assertIn("Строка 2", err.getvalue())
+        self.assertIn("Строка 3", err.getvalue())
+        self.assertIn("Строка 4: поле author не строка", err.getvalue())
+        self.assertEqual(
+            sorted(Post.objects.values_list("text", flat=True)),
+            ["Первый", "Последний"],
+        )
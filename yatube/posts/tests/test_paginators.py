@@ -1,6 +1,9 @@
 from django.core.cache import cache
-from django.test import Client, TestCase
-from posts.models import Post, Group
+from django.template.loader import render_to_string
+from django.test import Client, SimpleTestCase, TestCase
+from posts.models import Comment, Post, Group
+from posts.paginators import CursorPaginator, ElidedPaginator
+from posts.views import COMMENTS_PER_PAGE
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
@@ -44,3 +47,105 @@ class TestPaginator(TestCase):
         for page in templates_page_names:
             response = self.authorized_client.get(page)
             self.assertTrue(len(response.context["page_obj"]) == P_L)
+
+    def test_cursor_walks_all_posts(self):
+        """Курсоры next/prev обходят ленту без пропусков и повторов."""
+        response = self.authorized_client.get(reverse("posts:index"))
+        first_page = list(response.context["page_obj"])
+        next_cursor = response.context["page_obj"].next_cursor
+        self.assertIsNotNone(next_cursor)
+        response = self.authorized_client.get(
+            reverse("posts:index"), {"cursor": next_cursor}
+        )
+        page_obj = response.context["page_obj"]
+        self.assertEqual(len(page_obj), NUM_P - P_L)
+        self.assertFalse(page_obj.has_next())
+        self.assertTrue(page_obj.has_previous())
+        seen = {post.pk for post in [*first_page, *page_obj]}
+        self.assertEqual(len(seen), NUM_P)
+        response = self.authorized_client.get(
+            reverse("posts:index"), {"cursor": page_obj.previous_cursor}
+        )
+        self.assertEqual(list(response.context["page_obj"]), first_page)
+
+    def test_cursor_page_query_cost(self):
+        """Следующая страница стоит столько же запросов, сколько первая."""
+        paginator = CursorPaginator(Post.objects.all(), P_L)
+        with self.assertNumQueries(1):
+            page = paginator.get_page(None)
+        with self.assertNumQueries(1):
+            paginator.get_page(page.next_cursor)
+
+    def test_broken_cursor_returns_first_page(self):
+        """Битый курсор открывает первую страницу."""
+        response = self.authorized_client.get(
+            reverse("posts:index"), {"cursor": "не-курсор"}
+        )
+        self.assertEqual(len(response.context["page_obj"]), P_L)
+        self.assertFalse(response.context["page_obj"].has_previous())
+
+
+class ElidedPaginatorTests(SimpleTestCase):
+    def test_elided_range(self):
+        """Крайние страницы, соседи текущей и многоточия на пропусках."""
+        paginator = ElidedPaginator(range(1000), P_L)
+        ellipsis = ElidedPaginator.ELLIPSIS
+        self.assertEqual(
+            paginator.get_elided_page_range(50),
+            [1, ellipsis, 48, 49, 50, 51, 52, ellipsis, 100],
+        )
+        self.assertEqual(
+            paginator.get_elided_page_range(2),
+            [1, 2, 3, 4, ellipsis, 100],
+        )
+        self.assertEqual(
+            ElidedPaginator(range(50), P_L).get_elided_page_range(3),
+            [1, 2, 3, 4, 5],
+        )
+
+    def test_navigation_size_does_not_grow(self):
+        """Навигация по миллиону страниц не длиннее, чем по сотне."""
+        sizes = set()
+        for pages in (100, 10 ** 6):
+            page_obj = ElidedPaginator(
+                range(pages * P_L), P_L
+            ).get_page(pages // 2)
+            html = render_to_string(
+                "posts/includes/paginator.html",
+                {"page_obj": page_obj, "search_query": "пост"},
+            )
+            sizes.add(html.count("<li"))
+        self.assertEqual(sizes, {12})
+
+
+class CommentPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="commenter")
+        self.post = Post.objects.create(text="Пост", author=self.user)
+        Comment.objects.bulk_create(
+            Comment(text=f"Комментарий {number}", author=self.user,
+                    post=self.post)
+            for number in range(COMMENTS_PER_PAGE + 5)
+        )
+        self.client = Client()
+
+    def test_first_page_inline_rest_on_demand(self):
+        """Первая страница на странице поста, остальные — фрагментом."""
+        response = self.client.get(
+            reverse("posts:post_detail", kwargs={"post_id": self.post.pk})
+        )
+        comments = response.context["comments"]
+        self.assertEqual(len(comments), COMMENTS_PER_PAGE)
+        cursor = response.context["comments_cursor"]
+        self.assertContains(response, f"?cursor={cursor}")
+        url = reverse("posts:post_comments", kwargs={"post_id": self.post.pk})
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {"cursor": cursor})
+        rest = list(response.context["comments"])
+        self.assertEqual(len(rest), 5)
+        self.assertIsNone(response.context["comments_cursor"])
+        self.assertNotContains(response, "Показать ещё")
+        self.assertEqual(
+            {comment.pk for comment in [*comments, *rest]},
+            set(Comment.objects.values_list("pk", flat=True)),
+        )
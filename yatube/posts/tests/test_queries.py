@@ -0,0 +1,83 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post
+from posts.tests.utils import assert_max_queries
+
+User = get_user_model()
+NUM_P = 15
+
+# Бюджет запросов на страницу для авторизованного пользователя:
+# сессия и пользователь плюс запросы самой view.
+VIEW_QUERY_BUDGET = {
+    "posts:index": 4,
+    "posts:group_list": 4,
+    "posts:profile": 6,
+    "posts:follow_index": 5,
+    # +1: автор поста для ETag, см. post_detail_feeds.
+    "posts:post_detail": 6,
+}
+
+
+class ViewQueryBudgetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username="Alex")
+        cls.reader = User.objects.create(username="Mike")
+        cls.group = Group.objects.create(
+            title="Группа", slug="group1", description="Описание"
+        )
+        for number in range(NUM_P):
+            author = User.objects.create(username=f"author{number}")
+            Follow.objects.create(user=cls.reader, author=author)
+            Post.objects.create(text="Текст", author=author, group=cls.group)
+        cls.post = Post.objects.create(
+            text="Пост", author=cls.user, group=cls.group
+        )
+        for number in range(NUM_P):
+            Comment.objects.create(
+                text="Коммент", post=cls.post,
+                author=User.objects.get(username=f"author{number}"),
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_views_stay_within_query_budget(self):
+        """Число запросов не зависит от числа постов и комментариев."""
+        urls = {
+            "posts:index": reverse("posts:index"),
+            "posts:group_list": reverse(
+                "posts:group_list", kwargs={"slug": self.group.slug}
+            ),
+            "posts:profile": reverse(
+                "posts:profile", kwargs={"username": self.user.username}
+            ),
+            "posts:follow_index": reverse("posts:follow_index"),
+            "posts:post_detail": reverse(
+                "posts:post_detail", kwargs={"post_id": self.post.pk}
+            ),
+        }
+        for name, url in urls.items():
+            with self.subTest(view=name):
+                with assert_max_queries(self, VIEW_QUERY_BUDGET[name]):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_explain_feeds_uses_indexes(self):
+        """Запросы лент идут по составным индексам."""
+        out = StringIO()
+        call_command("explain_feeds", stdout=out)
+        plan = out.getvalue()
+        for index in ("post_date_idx", "post_group_date_idx",
+                      "post_author_date_idx", "timeline_user_date_idx",
+                      "comment_post_date_idx"):
+            with self.subTest(index=index):
+                self.assertIn(index, plan)
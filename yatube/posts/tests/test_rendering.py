@@ -0,0 +1,54 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Post
+
+User = get_user_model()
+
+
+class PostRenderingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="render_author")
+        self.post = Post.objects.create(
+            author=self.user,
+            text="Первый <b>абзац</b> http://example.com\n\nВторой абзац",
+        )
+
+    def test_html_rendered_on_save(self):
+        """save() экранирует текст, размечает ссылки и абзацы."""
+        self.assertEqual(
+            self.post.text_html,
+            "<p>Первый &lt;b&gt;абзац&lt;/b&gt; "
+            '<a href="http://example.com" rel="nofollow">'
+            "http://example.com</a></p>\n\n<p>Второй абзац</p>",
+        )
+        self.assertEqual(self.post.excerpt, "Первый <b>абзац</b> http://ex…")
+        self.post.text = "Правка"
+        self.post.save(update_fields=["text"])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text_html, "<p>Правка</p>")
+        self.assertEqual(self.post.excerpt, "Правка")
+
+    def test_pages_show_stored_html(self):
+        response = Client().get(
+            reverse("posts:post_detail", kwargs={"post_id": self.post.pk})
+        )
+        self.assertContains(response, self.post.text_html)
+        self.assertContains(
+            response, "<title>Пост Первый &lt;b&gt;абзац&lt;/b&gt; http://ex…"
+        )
+
+    def test_render_posts_fills_rows_saved_around_save(self):
+        """Команда дорисовывает строки, записанные без save()."""
+        Post.objects.filter(pk=self.post.pk).update(text_html="", excerpt="")
+        untouched = Post.objects.create(author=self.user, text="Готов")
+        updated = untouched.updated
+        call_command("render_posts", chunk_size=1, stdout=StringIO())
+        self.post.refresh_from_db()
+        untouched.refresh_from_db()
+        self.assertIn("Второй абзац", self.post.text_html)
+        self.assertTrue(self.post.excerpt)
+        self.assertEqual(untouched.updated, updated)
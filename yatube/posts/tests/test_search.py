@@ -0,0 +1,83 @@
+from functools import partial
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, SimpleTestCase, TestCase
+from django.urls import reverse
+from posts.models import Post
+from posts.search import FTS_TABLE, MemoryBackend, get_backend
+
+User = get_user_model()
+
+
+class MemoryBackendTests(SimpleTestCase):
+    def setUp(self):
+        self.backend = MemoryBackend()
+        self.backend.index(1, "Кошка спит на диване")
+        self.backend.index(2, "Кошка кошка и собака")
+        self.backend.index(3, "Собака лает")
+
+    def test_ranking_and_prefix(self):
+        """Чаще встречающееся слово выше, слова ищутся по префиксу."""
+        self.assertEqual(self.backend.search("кошк"), [2, 1])
+        self.assertEqual(self.backend.search("СОБАКА кошка"), [2])
+        self.assertEqual(self.backend.count("кошк"), 2)
+        self.assertEqual(self.backend.count(""), 0)
+
+    def test_remove_and_rebuild(self):
+        """Удалённый пост пропадает, rebuild заменяет индекс."""
+        self.backend.remove(2)
+        self.assertEqual(self.backend.search("собака"), [3])
+        self.backend.rebuild([(7, "новая собака")])
+        self.assertEqual(self.backend.search("собака"), [7])
+        self.assertEqual(self.backend.search("кошка"), [])
+
+
+class SearchViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="Alex")
+        self.cat = Post.objects.create(
+            text="Кошка спит на диване", author=self.user
+        )
+        self.cats = Post.objects.create(
+            text="Кошка кошка и собака", author=self.user
+        )
+        self.guest_client = Client()
+
+    def search(self, query):
+        response = self.guest_client.get(
+            reverse("posts:index"), {"search": query}
+        )
+        return list(response.context["page_obj"])
+
+    def test_search_uses_index(self):
+        """Поиск находит посты по индексу и сортирует по релевантности."""
+        self.assertEqual(self.search("кошка"), [self.cats, self.cat])
+        self.cats.text = "Только собака"
+        self.cats.save()
+        self.assertEqual(self.search("кошка"), [self.cat])
+        self.cat.delete()
+        self.assertEqual(self.search("кошка"), [])
+
+    def test_total_beyond_limit(self):
+        """Число найденных постов не обрезается лимитом выдачи."""
+        backend = get_backend()
+        first = partial(backend.search, limit=1)
+        with mock.patch.object(backend, "search", first):
+            response = self.guest_client.get(
+                reverse("posts:index"), {"search": "кошка"}
+            )
+        self.assertEqual(response.context["post_count"], 2)
+        self.assertEqual(len(response.context["page_obj"]), 1)
+        self.assertContains(response, "Показаны 1 самых подходящих")
+
+    def test_rebuild_command(self):
+        """rebuild_search_index восстанавливает индекс по таблице постов."""
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        self.assertEqual(self.search("диване"), [])
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(self.search("диване"), [self.cat])
@@ -0,0 +1,108 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts import events, streams
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(POSTS_LIVE_UPDATES=True, POSTS_EVENTS_MAX_STREAMS=100)
+class EventStreamTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create(username="stream_author")
+        self.reader = User.objects.create(username="stream_reader")
+        self.group = Group.objects.create(
+            title="Группа", slug="stream-group", description="Описание"
+        )
+        self.post = Post.objects.create(text="Пост", author=self.author)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def open_stream(self, client, name, **kwargs):
+        response = client.get(reverse(f"posts:{name}", kwargs=kwargs))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        chunks = iter(response.streaming_content)
+        self.addCleanup(response.close)
+        # Первый кусок — retry; после него поток уже подписан.
+        self.assertTrue(next(chunks).startswith(b"retry:"))
+        return chunks
+
+    @mock.patch("django.db.transaction.on_commit", lambda callback: callback())
+    def test_new_posts_counted_in_feeds(self):
+        """Ленты получают число новых постов с момента подключения."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        feeds = [
+            self.open_stream(self.reader_client, "events_index"),
+            self.open_stream(
+                self.reader_client, "events_group", slug=self.group.slug
+            ),
+            self.open_stream(
+                self.reader_client, "events_profile",
+                username=self.author.username,
+            ),
+            self.open_stream(self.reader_client, "events_follow"),
+        ]
+        for text in ("Первый", "Второй"):
+            self.author_client.post(
+                reverse("posts:post_create"),
+                {"text": text, "group": self.group.pk},
+            )
+        for chunks in feeds:
+            self.assertEqual(
+                [next(chunks), next(chunks)],
+                [
+                    b'event: posts\ndata: {"count": 1}\n\n',
+                    b'event: posts\ndata: {"count": 2}\n\n',
+                ],
+            )
+
+    @mock.patch("django.db.transaction.on_commit", lambda callback: callback())
+    def test_comment_event(self):
+        chunks = self.open_stream(
+            self.reader_client, "events_post", post_id=self.post.pk
+        )
+        self.author_client.post(
+            reverse("posts:add_comment", kwargs={"post_id": self.post.pk}),
+            {"text": "Новый комментарий"},
+        )
+        self.assertIn("Новый комментарий", next(chunks).decode())
+
+    @mock.patch.object(streams, "HEARTBEAT_SECONDS", 0.01)
+    def test_heartbeat_and_unsubscribe(self):
+        """Без событий поток шлёт heartbeat; закрытие снимает подписку."""
+        active = events.broker.active
+        response = self.reader_client.get(reverse("posts:events_index"))
+        chunks = iter(response.streaming_content)
+        next(chunks)
+        self.assertEqual(events.broker.active, active + 1)
+        self.assertEqual(next(chunks), b": heartbeat\n\n")
+        response.close()
+        self.assertEqual(events.broker.active, active)
+
+    def test_stream_limit(self):
+        with override_settings(
+            POSTS_EVENTS_MAX_STREAMS=events.broker.active
+        ):
+            response = self.reader_client.get(reverse("posts:events_index"))
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response)
+
+    def test_default_limit_from_threads(self):
+        """Без явного лимита потокам отдаётся половина обработчиков."""
+        with self.settings(WSGI_THREADS=8):
+            del settings.POSTS_EVENTS_MAX_STREAMS
+            self.assertEqual(events.broker.max_streams, 4)
+
+    @override_settings(POSTS_LIVE_UPDATES=False)
+    def test_disabled_by_setting(self):
+        """Выключенные обновления: ни баннера, ни потоков."""
+        response = self.reader_client.get(reverse("posts:index"))
+        self.assertNotContains(response, "data-events")
+        response = self.reader_client.get(reverse("posts:events_index"))
+        self.assertEqual(response.status_code, 404)
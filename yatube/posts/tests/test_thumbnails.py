@@ -0,0 +1,104 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+from posts import caching, thumbnails
+from posts.models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(name="photo.png"):
+    buffer = BytesIO()
+    Image.new("RGB", (60, 40), "red").save(buffer, "PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), "image/png")
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailPipelineTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        thumbnails.join()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="Alex")
+        self.post = Post.objects.create(
+            text="Пост с картинкой", author=self.user, image=make_image()
+        )
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    @mock.patch.object(thumbnails, "enqueue")
+    def test_missing_thumbnail_falls_back_to_original(self, enqueue):
+        """Пока миниатюры нет, страница отдаёт оригинал и ставит задачу."""
+        response = self.authorized_client.get(reverse("posts:index"))
+        self.assertContains(response, self.post.image.url)
+        enqueue.assert_called_with(self.post.image.name, self.post.pk)
+
+    def test_generated_thumbnails_are_used(self):
+        """После генерации шаблоны берут готовые миниатюры."""
+        thumbnails.generate_thumbnails(self.post.image.name)
+        for geometry, options in thumbnails.GEOMETRIES:
+            with self.subTest(geometry=geometry):
+                self.assertIsNotNone(thumbnails.cached_thumbnail(
+                    self.post.image, geometry, **options
+                ))
+        with mock.patch.object(thumbnails, "enqueue") as enqueue:
+            response = self.authorized_client.get(reverse("posts:index"))
+        enqueue.assert_not_called()
+        self.assertNotContains(response, self.post.image.url)
+
+    def test_generation_bumps_feeds(self):
+        """Готовые миниатюры сдвигают поколения лент и страницы поста:
+        кэш страниц и ETag перестают отдавать оригинал."""
+        feeds = [
+            caching.GLOBAL_FEED, caching.author_feed(self.user.username),
+            caching.post_feed(self.post.pk),
+        ]
+        before = caching.get_generations(feeds)
+        thumbnails.generate_thumbnails(self.post.image.name, self.post.pk)
+        after = caching.get_generations(feeds)
+        for old, new in zip(before, after):
+            self.assertGreater(new, old)
+
+    @mock.patch.object(thumbnails, "enqueue")
+    def test_post_create_enqueues_thumbnails(self, enqueue):
+        """Создание поста с картинкой ставит генерацию миниатюр."""
+        self.authorized_client.post(
+            reverse("posts:post_create"),
+            data={"text": "Новый пост", "image": make_image("new.png")},
+        )
+        post = Post.objects.get(text="Новый пост")
+        enqueue.assert_called_once_with(post.image.name, post.pk)
+
+    def test_page_thumbnails_resolved_in_one_query(self):
+        """Миниатюры всей страницы читаются из kvstore одним запросом."""
+        for number in range(3):
+            post = Post.objects.create(
+                text=f"Пост {number}", author=self.user,
+                image=make_image(f"page{number}.png"),
+            )
+            thumbnails.generate_thumbnails(post.image.name)
+        cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            response = self.authorized_client.get(reverse("posts:index"))
+        kvstore_queries = [
+            query for query in captured.captured_queries
+            if "thumbnail_kvstore" in query["sql"]
+        ]
+        self.assertEqual(len(kvstore_queries), 1)
+        self.assertEqual(response.content.decode().count("/cache/"), 3)
@@ -0,0 +1,75 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts import timeline
+from posts.models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    def setUp(self):
+        self.reader = User.objects.create(username="Alex")
+        self.author = User.objects.create(username="Mike")
+        self.old_post = Post.objects.create(
+            text="Старый пост", author=self.author
+        )
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def feed(self):
+        response = self.authorized_client.get(reverse("posts:follow_index"))
+        return list(response.context["page_obj"])
+
+    def test_follow_backfills_and_new_posts_fan_out(self):
+        """Подписка добавляет старые посты, новые раскладываются сразу."""
+        self.authorized_client.get(reverse(
+            "posts:profile_follow", kwargs={"username": self.author}
+        ))
+        new_post = Post.objects.create(text="Новый пост", author=self.author)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 2
+        )
+        self.assertEqual(self.feed(), [new_post, self.old_post])
+
+    def test_unfollow_prunes_timeline(self):
+        """Отписка убирает посты автора из ленты."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.authorized_client.get(reverse(
+            "posts:profile_unfollow", kwargs={"username": self.author}
+        ))
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+        self.assertEqual(self.feed(), [])
+
+    @mock.patch.object(timeline, "CELEBRITY_FOLLOWERS", 1)
+    def test_celebrity_posts_read_at_request_time(self):
+        """Посты знаменитостей не раскладываются, но попадают в ленту."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        new_post = Post.objects.create(text="Новый пост", author=self.author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.feed(), [new_post, self.old_post])
+
+    @mock.patch.object(timeline, "BATCH_SIZE", 2)
+    def test_follow_backfills_whole_history(self):
+        """Подписка переносит в ленту все посты автора, а не последние."""
+        for number in range(4):
+            Post.objects.create(text=f"Пост {number}", author=self.author)
+        self.authorized_client.get(reverse(
+            "posts:profile_follow", kwargs={"username": self.author}
+        ))
+        response = self.authorized_client.get(reverse("posts:follow_index"))
+        self.assertEqual(len(response.context["page_obj"]), 5)
+        self.assertEqual(response.context["post_count"], 5)
+
+    @mock.patch.object(timeline, "CELEBRITY_FOLLOWERS", 2)
+    def test_former_celebrity_posts_kept_after_unfollow(self):
+        """Посты, вышедшие у знаменитости, не пропадают из ленты, когда
+        после отписки она опускается ниже порога."""
+        other = User.objects.create(username="timeline_other")
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=other, author=self.author)
+        new_post = Post.objects.create(text="Новый пост", author=self.author)
+        Follow.objects.filter(user=other).delete()
+        self.assertEqual(self.feed(), [new_post, self.old_post])
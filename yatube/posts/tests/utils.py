@@ -0,0 +1,19 @@
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@contextmanager
+def assert_max_queries(testcase, limit):
+    """Падает, если внутри блока было больше limit SQL-запросов."""
+    with CaptureQueriesContext(connection) as context:
+        yield context
+    executed = len(context.captured_queries)
+    queries = "\n".join(
+        query["sql"] for query in context.captured_queries
+    )
+    testcase.assertLessEqual(
+        executed, limit,
+        f"{executed} запросов вместо не более {limit}:\n{queries}"
+    )
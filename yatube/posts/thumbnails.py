@@ -0,0 +1,167 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.db import connection, transaction
+from django.utils import timezone
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores import cached_db_kvstore
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from . import caching
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+# Все геометрии, в которых шаблоны показывают картинку поста.
+GEOMETRIES = (
+    ("900x300", {"crop": "center", "upscale": True}),
+    ("900", {"crop": "center", "upscale": True}),
+    ("1200", {"crop": "center", "upscale": True}),
+)
+WORKERS: int = 2
+JOIN_TIMEOUT: int = 30
+
+_executor = None
+# Задачи в работе: {(имя картинки, id поста): future}.
+_pending = {}
+_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=WORKERS, thread_name_prefix="thumbnails"
+            )
+        return _executor
+
+
+def thumbnail_options(source, options):
+    """Опции с умолчаниями sorl, как их дополняет get_thumbnail()."""
+    options = dict(options)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault("format", default.backend._get_format(source))
+    for key, value in default.backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in default.backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+    return options
+
+
+def thumbnail_file(file_, geometry, options):
+    """ImageFile миниатюры, как её назовёт sorl (файла может не быть)."""
+    source = ImageFile(file_)
+    name = default.backend._get_thumbnail_filename(
+        source, geometry, thumbnail_options(source, options)
+    )
+    return ImageFile(name, default.storage)
+
+
+def cached_thumbnail(file_, geometry, **options):
+    """Готовая миниатюра из kvstore sorl или None, без генерации."""
+    return default.kvstore.get(thumbnail_file(file_, geometry, options))
+
+
+def cached_thumbnails(files, geometry, **options):
+    """Готовые миниатюры сразу для многих картинок: {имя файла: ImageFile
+    или None}.
+
+    kvstore sorl по умолчанию (кэш + таблица) ищет каждый ключ отдельно;
+    здесь все ключи читаются одним get_many, а промахи — одним запросом
+    к таблице. С другими kvstore — по одному, как cached_thumbnail.
+    """
+    files = [file_ for file_ in files if file_]
+    if not isinstance(default.kvstore, cached_db_kvstore.KVStore):
+        return {
+            getattr(file_, "name", file_): cached_thumbnail(
+                file_, geometry, **options
+            )
+            for file_ in files
+        }
+    keys = {}
+    for file_ in files:
+        thumbnail = thumbnail_file(file_, geometry, options)
+        keys[add_prefix(thumbnail.key)] = getattr(file_, "name", file_)
+    kv_cache = default.kvstore.cache
+    values = kv_cache.get_many(list(keys))
+    missing = keys.keys() - values.keys()
+    if missing:
+        stored = dict(KVStoreModel.objects.filter(
+            key__in=missing
+        ).values_list("key", "value"))
+        # Отсутствие тоже кэшируется, как в KVStore._get_raw.
+        empty = cached_db_kvstore.EMPTY_VALUE
+        stored.update({key: empty for key in missing - stored.keys()})
+        kv_cache.set_many(stored, sorl_settings.THUMBNAIL_CACHE_TIMEOUT)
+        values.update(stored)
+    thumbnails = {}
+    for key, name in keys.items():
+        value = values[key]
+        thumbnails[name] = None
+        if value and value != cached_db_kvstore.EMPTY_VALUE:
+            thumbnails[name] = deserialize_image_file(value)
+    return thumbnails
+
+
+def generate_thumbnails(name, post_id=None):
+    for geometry, options in GEOMETRIES:
+        get_thumbnail(name, geometry, **options)
+    if post_id is None:
+        return
+    feeds = Post.objects.filter(pk=post_id).values_list(
+        "author__username", "group__slug"
+    ).first()
+    if feeds is None:
+        return
+    username, slug = feeds
+    # Карточки с оригиналом вместо миниатюры лежат в кэше фрагментов;
+    # новая версия поста их вытеснит. Страницы лент и поста в кэше и их
+    # ETag сбрасывает сдвиг поколений.
+    Post.objects.filter(pk=post_id).update(updated=timezone.now())
+    caching.bump_generation(
+        caching.GLOBAL_FEED, caching.author_feed(username),
+        caching.post_feed(post_id),
+        *([caching.group_feed(slug)] if slug else []),
+    )
+
+
+def work(name, post_id):
+    """Задача пула: своё соединение с базой закрывается по окончании."""
+    try:
+        generate_thumbnails(name, post_id)
+    except Exception:
+        logger.exception("Не удалось сделать миниатюры для %s", name)
+    finally:
+        with _lock:
+            _pending.pop((name, post_id), None)
+        connection.close()
+
+
+def submit(name, post_id):
+    executor = get_executor()
+    with _lock:
+        if (name, post_id) in _pending:
+            return
+        _pending[name, post_id] = executor.submit(work, name, post_id)
+
+
+def enqueue(name, post_id=None):
+    """Ставит генерацию всех геометрий картинки поста post_id в пул
+    после коммита."""
+    if name:
+        transaction.on_commit(lambda: submit(name, post_id))
+
+
+def join(timeout=JOIN_TIMEOUT):
+    """Дожидается всех задач пула: тестам — перед удалением MEDIA_ROOT."""
+    with _lock:
+        futures = list(_pending.values())
+    wait(futures, timeout=timeout)
@@ -0,0 +1,117 @@
+from django.db import transaction
+from django.db.models import F, Q
+
+from . import counters
+from .models import Counter, Follow, Post, TimelineEntry
+
+# Авторов с таким числом подписчиков не раскладываем по лентам:
+# их посты подмешиваются в ленту подписок при чтении.
+CELEBRITY_FOLLOWERS: int = 10000
+# SQLite не принимает больше 500 строк в одном INSERT.
+BATCH_SIZE: int = 500
+
+
+def is_celebrity(author_id):
+    followers = counters.get_count(counters.FOLLOWERS, author_id)
+    return followers >= CELEBRITY_FOLLOWERS
+
+
+def fan_out(post):
+    """Кладёт новый пост в ленты всех подписчиков автора."""
+    if is_celebrity(post.author_id):
+        return
+    follower_ids = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list("user_id", flat=True)
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(
+                user_id=user_id,
+                post_id=post.pk,
+                author_id=post.author_id,
+                pub_date=post.pub_date,
+            )
+            for user_id in follower_ids.iterator()
+        ],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту все посты автора после подписки — пачками по
+    первичному ключу, чтобы лента подписок совпадала с его профилем."""
+    if is_celebrity(author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        "pk"
+    ).values_list("id", "pub_date")
+    last_id = 0
+    while True:
+        batch = list(posts.filter(pk__gt=last_id)[:BATCH_SIZE])
+        if not batch:
+            return
+        last_id = batch[-1][0]
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(
+                    user_id=user_id, post_id=post_id, author_id=author_id,
+                    pub_date=pub_date,
+                )
+                for post_id, pub_date in batch
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def demote(author_id):
+    """Отписка опустила автора ниже порога знаменитости: его посты,
+    которые не раскладывались, пока он им был, докладываются в ленты
+    оставшихся подписчиков — дальше они читаются только оттуда."""
+    followers = counters.get_count(counters.FOLLOWERS, author_id)
+    if followers + 1 != CELEBRITY_FOLLOWERS:
+        return
+    follower_ids = Follow.objects.filter(
+        author_id=author_id
+    ).values_list("user_id", flat=True)
+    for user_id in follower_ids.iterator():
+        backfill(user_id, author_id)
+
+
+def prune(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+@transaction.atomic
+def rebuild():
+    """Собирает все ленты заново по подпискам (после загрузки в обход
+    сигналов)."""
+    TimelineEntry.objects.all().delete()
+    follows = Follow.objects.values_list("user_id", "author_id")
+    for user_id, author_id in follows.iterator():
+        backfill(user_id, author_id)
+
+
+def follow_feed(user):
+    """Лента подписок и поле даты, по которому её листать.
+
+    Обычно это один диапазон по индексу материализованной ленты; посты
+    подписанных знаменитостей читаются из posts_post на лету.
+    """
+    celebrity_ids = list(Counter.objects.filter(
+        kind=counters.FOLLOWERS,
+        value__gte=CELEBRITY_FOLLOWERS,
+        object_id__in=Follow.objects.filter(user=user).values("author_id"),
+    ).values_list("object_id", flat=True))
+    if not celebrity_ids:
+        posts = Post.objects.feed().filter(
+            timeline_entries__user=user
+        ).annotate(
+            feed_date=F("timeline_entries__pub_date")
+        )
+        return posts, "feed_date"
+    posts = Post.objects.feed().filter(
+        Q(pk__in=TimelineEntry.objects.filter(user=user).values("post_id"))
+        | Q(author_id__in=celebrity_ids)
+    )
+    return posts, "pub_date"
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import api, streams, views
 
 app_name = "posts"
 
@@ -19,6 +19,8 @@ urlpatterns = [
     path("posts/comment/<int:comment_id>/delete/", views.comment_delete,
          name="comment_delete"),
     path('posts/<post_id>/comment/', views.add_comment, name='add_comment'),
+    path("posts/<int:post_id>/comments/", views.post_comments,
+         name="post_comments"),
     path('follow/', views.follow_index, name='follow_index'),
     path(
         'profile/<str:username>/follow/',
@@ -30,4 +32,16 @@ urlpatterns = [
         views.profile_unfollow,
         name='profile_unfollow'
     ),
+    path("export/<str:kind>/", views.export, name="export"),
+    path("api/posts/", api.index, name="api_index"),
+    path("api/group/<slug:slug>/", api.group_posts, name="api_group_list"),
+    path("api/profile/<username>/", api.profile, name="api_profile"),
+    path("events/", streams.index, name="events_index"),
+    path("events/group/<slug:slug>/", streams.group_posts,
+         name="events_group"),
+    path("events/profile/<username>/", streams.profile,
+         name="events_profile"),
+    path("events/follow/", streams.follow_index, name="events_follow"),
+    path("events/posts/<int:post_id>/", streams.post_detail,
+         name="events_post"),
 ]
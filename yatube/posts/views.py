@@ -1,41 +1,96 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.core.paginator import Paginator
-from django.views.decorators.cache import cache_page
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404, StreamingHttpResponse
+from django.views.decorators.http import condition, require_GET
+from core.routers import use_replica
+from . import counters, events, thumbnails, timeline
+from .caching import (GLOBAL_FEED, author_feed, cache_feed_page,
+                      feed_conditions, group_feed, post_feed)
+from .export import EXPORTS, FORMATS, export_lines, gzip_stream
 from .models import Post, Group, Follow, User, Comment
 from .forms import PostForm, CommentForm
+from .paginators import (CURSOR_PARAM, CursorPaginator, ElidedPaginator,
+                         ascending_page)
+from .search import get_backend
 from django.contrib.auth.decorators import login_required
 
 PER_PAGE: int = 10
+COMMENTS_PER_PAGE: int = 20
 
 
-#@cache_page(20 * 1)
+def get_feed_page(request, posts, date_field="pub_date"):
+    """Страница ленты по курсору из GET-параметра."""
+    paginator = CursorPaginator(posts, PER_PAGE, date_field=date_field)
+    return paginator.get_page(request.GET.get(CURSOR_PARAM))
+
+
+def get_search_page(request, search_query):
+    """Страница результатов поиска в порядке релевантности."""
+    post_ids = get_backend().search(search_query)
+    paginator = ElidedPaginator(post_ids, PER_PAGE)
+    page_obj = paginator.get_page(request.GET.get("page"))
+    posts = Post.objects.feed().in_bulk(
+        page_obj.object_list
+    )
+    page_obj.object_list = [
+        posts[post_id] for post_id in page_obj.object_list
+        if post_id in posts
+    ]
+    return page_obj
+
+
+def post_detail_feeds(post_id):
+    """Пост меняется вместе с лентой автора (правка, число его постов)
+    и со своими комментариями."""
+    username = Post.objects.filter(pk=post_id).values_list(
+        "author__username", flat=True
+    ).first()
+    if username is None:
+        return None
+    return [author_feed(username), post_feed(post_id)]
+
+
+# condition() стоит снаружи кэша страниц: ответ 304 не трогает даже кэш.
+@use_replica
+@condition(**feed_conditions(lambda: [GLOBAL_FEED], per_user=True))
+@cache_feed_page(lambda: [GLOBAL_FEED])
 def index(request):
     search_query = request.GET.get('search', '')
     if search_query:
-        post_list = Post.objects.filter(text__icontains=search_query)
+        page_obj = get_search_page(request, search_query)
+        # Страницы поиска идут по первым SEARCH_LIMIT результатам, а
+        # всего найдено может быть больше.
+        post_count = get_backend().count(search_query)
     else:
-        post_list = Post.objects.select_related('author', 'group').all()
-    post_count = post_list.count()
-    paginator = Paginator(post_list, PER_PAGE)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+        post_list = Post.objects.feed()
+        post_count = counters.get_count(counters.TOTAL_POSTS)
+        page_obj = get_feed_page(request, post_list)
     context = {
         "page_obj": page_obj,
-        "post_count": post_count
+        "post_count": post_count,
+        "search_query": search_query,
     }
     return render(request, "posts/index.html", context)
 
 
+@use_replica
+@condition(**feed_conditions(
+    lambda slug: [group_feed(slug)], per_user=True
+))
+@cache_feed_page(lambda slug: [group_feed(slug)])
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, PER_PAGE)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    posts = group.posts.feed()
+    page_obj = get_feed_page(request, posts)
     context = {"page_obj": page_obj, "group": group}
     return render(request, "posts/group_list.html", context)
 
 
+@use_replica
+@condition(**feed_conditions(
+    lambda username: [author_feed(username)], per_user=True
+))
+@cache_feed_page(lambda username: [author_feed(username)])
 def profile(request, username):
     author = get_object_or_404(User, username=username)
     if request.user.is_authenticated:
@@ -44,34 +99,62 @@ def profile(request, username):
             author=author).exists()
     else:
         following = None
-    post_list = author.posts.all()
-    paginator = Paginator(post_list, PER_PAGE)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
-    count_post = post_list.count()
+    post_list = author.posts.feed()
+    page_obj = get_feed_page(request, post_list)
+    author_counts = counters.get_object_counts(
+        (counters.AUTHOR_POSTS, counters.FOLLOWERS, counters.FOLLOWING),
+        author.pk,
+    )
     context = {
         "page_obj": page_obj,
-        "count_post": count_post,
+        "count_post": author_counts[counters.AUTHOR_POSTS],
+        "followers_count": author_counts[counters.FOLLOWERS],
+        "following_count": author_counts[counters.FOLLOWING],
         "author": author,
         "following": following}
     return render(request, "posts/profile.html", context)
 
 
+@use_replica
+@condition(**feed_conditions(
+    post_detail_feeds, per_user=True, forms=True
+))
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.detail().with_counts(), pk=post_id
+    )
     form = CommentForm(
         request.POST or None)
-    comments = post.comments.all()
-    count = Post.objects.filter(group=post.group).count()
+    comments, comments_cursor = ascending_page(
+        post.comments.feed(), None, COMMENTS_PER_PAGE
+    )
+    count = counters.get_count(counters.AUTHOR_POSTS, post.author_id)
     context = {
         "post": post,
         "count": count,
         "form": form,
-        "comments": comments
+        "comments": comments,
+        "comments_cursor": comments_cursor,
     }
     return render(request, "posts/post_detail.html", context)
 
 
+@use_replica
+@require_GET
+def post_comments(request, post_id):
+    """Следующая страница комментариев фрагментом для «Показать ещё»."""
+    comments, comments_cursor = ascending_page(
+        Comment.objects.filter(post_id=post_id).feed(),
+        request.GET.get(CURSOR_PARAM), COMMENTS_PER_PAGE,
+    )
+    context = {
+        "post_id": post_id,
+        "comments": comments,
+        "comments_cursor": comments_cursor,
+    }
+    return render(request, "posts/includes/comments.html", context)
+
+
 # это моя фишка(вне курса ЯП)
 @login_required
 def post_delete(request, post_id):
@@ -92,14 +175,16 @@ def post_create(request):
     post = form.save(commit=False)
     post.author = request.user
     form.save()
+    thumbnails.enqueue(post.image.name, post.pk)
+    events.publish_post(post)
     return redirect("posts:profile", username=request.user)
 
 
 @login_required()
 def post_edit(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(Post.objects.detail(), pk=post_id)
     if request.user != post.author:
-        count = Post.objects.filter(group=post.group).count()
+        count = counters.get_count(counters.AUTHOR_POSTS, post.author_id)
         context = {"post": post, "count": count}
         return render(request, "posts/post_detail.html", context)
     is_edit = True
@@ -113,6 +198,7 @@ def post_edit(request, post_id):
     post = form.save(commit=False)
     post.author = request.user
     form.save()
+    thumbnails.enqueue(post.image.name, post.pk)
     return redirect("posts:post_detail", post_id=post.id)
 
 
@@ -125,6 +211,7 @@ def add_comment(request, post_id):
         comment.author = request.user
         comment.post = post
         comment.save()
+        events.publish_comment(comment)
     return redirect('posts:post_detail', post_id=post_id)
 
 @login_required
@@ -135,15 +222,17 @@ def comment_delete(request, comment_id):
     comment.delete()
     return redirect('posts:index')
 
+@use_replica
 @login_required
 def follow_index(request):
     # информация о текущем пользователе доступна в переменной request.user
     user = request.user
-    post_list = Post.objects.filter(author__following__user=user)
-    post_count = post_list.count()
-    paginator = Paginator(post_list, PER_PAGE)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    post_list, date_field = timeline.follow_feed(user)
+    post_count = counters.sum_counts(
+        counters.AUTHOR_POSTS,
+        Follow.objects.filter(user=user).values("author_id"),
+    )
+    page_obj = get_feed_page(request, post_list, date_field)
     context = {
         "page_obj": page_obj,
         "post_count": post_count
@@ -171,3 +260,28 @@ def profile_unfollow(request, username):
         author=user
     ).delete()
     return redirect('posts:index')
+
+
+@staff_member_required
+def export(request, kind):
+    """Выгрузка таблицы потоком: ?format=jsonl|csv&gzip=1&after=<id>."""
+    file_format = request.GET.get("format", "jsonl")
+    after = request.GET.get("after", "0")
+    if kind not in EXPORTS or file_format not in FORMATS:
+        raise Http404
+    if not after.isdigit():
+        raise Http404
+    lines = export_lines(kind, file_format, int(after), header=after == "0")
+    filename = f"{kind}.{file_format}"
+    if request.GET.get("gzip"):
+        response = StreamingHttpResponse(
+            gzip_stream(lines), content_type="application/gzip"
+        )
+        filename += ".gz"
+    else:
+        content_type = "text/csv"
+        if file_format == "jsonl":
+            content_type = "application/x-ndjson"
+        response = StreamingHttpResponse(lines, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,28 @@
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+USER_CACHE_TIMEOUT: int = 5 * 60
+
+
+def user_cache_key(user_id):
+    return f"auth-user:{user_id}"
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берёт пользователя сессии из кэша.
+
+    Строка auth_user лежит в кэше до сохранения или удаления
+    пользователя (см. users.signals), так что запрос авторизованного
+    читателя не ходит в базу за пользователем. Внутри запроса он и так
+    один: AuthenticationMiddleware запоминает request.user.
+    """
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(key, user, USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+# Кэши, у которых у каждого процесса своя копия данных.
+LOCAL_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+CACHED_SESSION_ENGINES = (
+    "django.contrib.sessions.backends.cache",
+    "django.contrib.sessions.backends.cached_db",
+)
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """Сессии и пользователи в кэше требуют кэша, общего для процессов."""
+    if settings.CACHES["default"]["BACKEND"] not in LOCAL_CACHE_BACKENDS:
+        return []
+    errors = []
+    if settings.SESSION_ENGINE in CACHED_SESSION_ENGINES:
+        errors.append(Error(
+            "Сессии в кэше одного процесса: выход не виден другим.",
+            hint="Настройте общий кэш (core.cache.SQLiteCache) или "
+                 "SESSION_ENGINE db/signed_cookies.",
+            id="users.E001",
+        ))
+    if "users.backends.CachedModelBackend" in settings.AUTHENTICATION_BACKENDS:
+        errors.append(Error(
+            "CachedModelBackend с кэшем одного процесса: смена пароля и "
+            "блокировка не видны другим.",
+            hint="Настройте общий кэш или ModelBackend.",
+            id="users.E002",
+        ))
+    return errors
@@ -0,0 +1,68 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from users.backends import CachedModelBackend
+from users.checks import check_shared_cache
+
+User = get_user_model()
+
+
+class CachedAuthTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="cached_user")
+
+    def count_queries(self):
+        """SQL-запросы второго (прогретого) просмотра страницы."""
+        client = Client()
+        client.force_login(self.user)
+        url = reverse("about:author")
+        client.get(url)
+        with CaptureQueriesContext(connection) as captured:
+            client.get(url)
+        return len(captured.captured_queries)
+
+    def test_saved_queries(self):
+        """Сессия и пользователь читаются из кэша, а не из базы."""
+        self.assertEqual(self.count_queries(), 2)
+        with override_settings(
+            SESSION_ENGINE="django.contrib.sessions.backends.cached_db",
+            AUTHENTICATION_BACKENDS=["users.backends.CachedModelBackend"],
+        ):
+            self.assertEqual(self.count_queries(), 0)
+
+    def test_cached_auth_needs_shared_cache(self):
+        """С кэшем одного процесса кэшированные сессии — ошибка проверки."""
+        with override_settings(
+            SESSION_ENGINE="django.contrib.sessions.backends.cached_db",
+            AUTHENTICATION_BACKENDS=["users.backends.CachedModelBackend"],
+        ):
+            errors = check_shared_cache(None)
+        self.assertEqual(
+            [error.id for error in errors], ["users.E001", "users.E002"]
+        )
+        with override_settings(CACHES={"default": {
+            "BACKEND": "core.cache.SQLiteCache",
+            "LOCATION": ":memory:",
+        }}, SESSION_ENGINE="django.contrib.sessions.backends.cached_db"):
+            self.assertEqual(check_shared_cache(None), [])
+
+    def test_cached_user_invalidated_on_save(self):
+        """Сохранение пользователя сбрасывает его копию в кэше."""
+        backend = CachedModelBackend()
+        backend.get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(backend.get_user(self.user.pk), self.user)
+        self.user.first_name = "Новое имя"
+        self.user.save()
+        self.assertEqual(
+            backend.get_user(self.user.pk).first_name, "Новое имя"
+        )
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(backend.get_user(self.user.pk))
+        self.user.delete()
+        self.assertIsNone(backend.get_user(self.user.pk))
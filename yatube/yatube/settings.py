@@ -33,6 +33,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "core.middleware.MetricsMiddleware",
+    "core.middleware.ReplicaMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -56,6 +58,7 @@ TEMPLATES = [
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
                 "core.context_processors.year.year",
+                "core.context_processors.live_updates.live_updates",
             ],
         },
     },
@@ -70,6 +73,17 @@ DATABASES = {
     }
 }
 
+# Реплики только для чтения (алиасы из DATABASES), с них читают ленты.
+# Локально это копии db.sqlite3, которые обновляет manage.py sync_replicas:
+# DATABASES["replica1"] = {
+#     **DATABASES["default"],
+#     "NAME": os.path.join(BASE_DIR, "db_replica1.sqlite3"),
+#     "TEST": {"MIRROR": "default"},
+# }
+# DATABASE_REPLICAS = ["replica1"]
+DATABASE_REPLICAS = []
+DATABASE_ROUTERS = ["core.routers.ReplicaRouter"]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -107,9 +121,54 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Загрузки пишутся во временный файл кусками, а не собираются в памяти;
+# картинку постов затем уменьшает posts.images.
+FILE_UPLOAD_HANDLERS = [
+    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+]
 
+# Кэш одного процесса. Для нескольких процессов на сервере есть общий
+# кэш в файле SQLite: 'BACKEND': 'core.cache.SQLiteCache' и путь к файлу
+# в 'LOCATION' (настройки — в docstring core/cache.py).
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+
+# Сессия и её пользователь читаются из кэша, только если кэш общий для
+# всех процессов: иначе выход, смена пароля и блокировка сбрасывают
+# копию лишь в одном процессе (проверка users.E001/E002). Без общего
+# кэша можно взять "django.contrib.sessions.backends.signed_cookies":
+# сессия будет жить в подписанной cookie без базы и кэша.
+# То же с кэшем страниц лент и ETag по поколениям (POSTS_FEED_CACHE,
+# проверка posts.E001): сдвиг поколения в одном процессе другие не
+# увидят и будут отдавать удалённые посты и 304 на изменённые ленты.
+if CACHES['default']['BACKEND'].endswith(('LocMemCache', 'DummyCache')):
+    POSTS_FEED_CACHE = False
+    SESSION_ENGINE = "django.contrib.sessions.backends.db"
+    AUTHENTICATION_BACKENDS = [
+        "django.contrib.auth.backends.ModelBackend",
+    ]
+else:
+    POSTS_FEED_CACHE = True
+    SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+    AUTHENTICATION_BACKENDS = [
+        "users.backends.CachedModelBackend",
+        # Для сессий, открытых до перехода на кэш.
+        "django.contrib.auth.backends.ModelBackend",
+    ]
+
+POSTS_SEARCH_BACKEND = 'posts.search.SQLiteFTSBackend'
+
+# Баннер «Новых постов» и потоки событий: каждый открытый поток занимает
+# обработчик запросов целиком, поэтому включать их стоит только на
+# сервере с гринлетами (gunicorn -k gevent) и с POSTS_EVENTS_MAX_STREAMS
+# под его ёмкость.
+POSTS_LIVE_UPDATES = False
+# Обработчиков запросов в одном процессе (gunicorn --threads); от этого
+# числа считается лимит потоков событий по умолчанию.
+WSGI_THREADS = 4
+
+METRICS_SLOW_REQUEST_SECONDS = 1.0
+METRICS_SLOW_REQUEST_SAMPLE_RATE = 0.1